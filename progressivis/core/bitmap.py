@@ -17,6 +17,20 @@ else:  # pragma no cover
     _integer_types = (int, np.integer)
 
 
+def _as_uint32_array(values):
+    "Convert an integer ndarray to an array.array('I') without a python loop"
+    if len(values) and (values.min() < 0 or values.max() > 0xFFFFFFFF):
+        raise OverflowError('bitmap values should be 32 bits unsigned integers')
+    ret = array.array('I')
+    ret.frombytes(np.ascontiguousarray(values, dtype=np.uint32).tobytes())
+    return ret
+
+
+def _is_int_array(values):
+    return (isinstance(values, np.ndarray) and values.ndim == 1
+            and values.dtype.kind in 'iu')
+
+
 class bitmap(BitMap,object):
     # pylint: disable=invalid-name
     """
@@ -25,6 +39,8 @@ class bitmap(BitMap,object):
     def __new__(cls, values=None, copy_on_write=False, optimize=True, no_init=False):
         if isinstance(values, slice):
             values = range(values.start, values.stop, (values.step or 1))
+        elif _is_int_array(values):
+            values = _as_uint32_array(values)
         return super(bitmap, cls).__new__(cls, values, copy_on_write, optimize, no_init)
         #BitMap.__init__(self, values, copy_on_write)
 
@@ -72,6 +88,11 @@ class bitmap(BitMap,object):
 
     def update(self, values):
         "Add new values from either a bitmap, an array, a slice, or an Iterable"
+        if isinstance(values, slice) and values.step in (None, 1):
+            self.add_range(values.start or 0, values.stop)
+            return
+        if _is_int_array(values):
+            values = _as_uint32_array(values)
         try:
             BitMap.update(self, values)
         except TypeError:
@@ -6,9 +6,6 @@ from __future__ import absolute_import, division, print_function
 
 import logging
 
-from uuid import uuid4
-import six
-
 from .utils import ProgressiveError
 from .scheduler_base import BaseScheduler
 
@@ -29,6 +26,7 @@ class Dataflow(object):
         self._modules_deleted = None
         self._slots_created = None
         self._slots_deleted = None
+        self._prefix_counter = {}
 
     default = None
 
@@ -68,23 +66,19 @@ class Dataflow(object):
 
     def collect_dependencies(self, only_required=False):
         "Return the dependecies of the modules"
-        dependencies = {}
-        for (mid, module) in six.iteritems(self._modules):
-            if not module.is_valid():
-                continue
-            outs = [m.output_module.name for m in module.input_slot_values()
-                    if m and (not only_required or
-                              module.input_slot_required(m.input_name))]
-            dependencies[mid] = set(outs)
-        return dependencies
+        return {mid: {m.output_module.name for m in module.input_slot_values()
+                      if m and (not only_required or
+                                module.input_slot_required(m.input_name))}
+                for (mid, module) in self._modules.items()
+                if module.is_valid()}
 
     def validate(self):
         "Validate the Dataflow, returning [] if it is valid or the invalid modules otherwise."
-        invalid = []
-        for module in self._modules.values():
-            if not module.validate():
-                logger.error('Cannot validate module %s', module.name)
-                invalid.append(module)
+        invalid = [module for module in self._modules.values()
+                   if not module.validate()]
+        if invalid:
+            logger.error('Cannot validate %d module(s): %s', len(invalid),
+                         ', '.join(module.name for module in invalid))
         return invalid
 
     def __len__(self):
@@ -109,8 +103,10 @@ class Dataflow(object):
 
     def generate_id(self, prefix):
         "Generate an id for a module."
-        for i in range(1, 10):
+        i = self._prefix_counter.get(prefix, 0) + 1
+        mid = '%s_%d' % (prefix, i)
+        while mid in self._modules:
+            i += 1
             mid = '%s_%d' % (prefix, i)
-            if mid not in self._modules:
-                return mid
-        return '%s_%s' % (prefix, uuid4())
+        self._prefix_counter[prefix] = i
+        return mid
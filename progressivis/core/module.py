@@ -4,12 +4,14 @@ from __future__ import absolute_import, division, print_function
 
 from abc import ABCMeta, abstractmethod
 from traceback import print_exc
+from inspect import getfullargspec
+from functools import lru_cache
+import sys
 import re
 import pdb
 import logging
 
 import numpy as np
-import six
 
 from progressivis.table.table_base import BaseTable
 from progressivis.table.table import Table
@@ -18,23 +20,59 @@ from progressivis.table.row import Row
 from progressivis.storage import Group
 
 from .scheduler_base import BaseScheduler
-from .utils import (ProgressiveError, type_fullname, get_random_name)
+from .utils import (ProgressiveError, type_fullname, get_random_name,
+                    FakeLock)
 from .slot import (SlotDescriptor, Slot, InputSlots, OutputSlots)
 from .tracer_base import Tracer
 from .time_predictor import TimePredictor
 from .storagemanager import StorageManager
 
-if six.PY2:  # pragma no cover
-    from inspect import getargspec as getfullargspec
-else:  # pragma no cover
-    from inspect import getfullargspec
-
 logger = logging.getLogger(__name__)
 
+# Module states, also exposed as Module.state_* attributes
+_ST_CREATED = 0
+_ST_READY = 1
+_ST_RUNNING = 2
+_ST_BLOCKED = 3
+_ST_ZOMBIE = 4
+_ST_TERMINATED = 5
+_ST_INVALID = 6
+_ST_DEAD = frozenset([_ST_ZOMBIE, _ST_TERMINATED, _ST_INVALID])
+_VALID_STATES = frozenset(range(_ST_CREATED, _ST_INVALID+1))
+# states that run_step can return
+_VALID_NEXT = frozenset([_ST_READY, _ST_RUNNING, _ST_BLOCKED, _ST_ZOMBIE])
+# states counted by the scheduler over its run list
+_ST_COUNTED = frozenset([_ST_BLOCKED, _ST_TERMINATED])
+
+_CAMEL1 = re.compile('(.)([A-Z][a-z]+)')
+_CAMEL2 = re.compile('([a-z0-9])([A-Z])')
+_MODSUF = re.compile('_module$')
+
+
+@lru_cache(maxsize=None)
+def _keyword_args(function):
+    "Return the names of the arguments of function with a default value"
+    argspec = getfullargspec(function)
+    return frozenset(argspec.args[len(argspec.args) -
+                                  (0 if argspec.defaults is None
+                                   else len(argspec.defaults)):])
+
+
+def _columns_dshape(columns):
+    return '{%s}' % ','.join('%s: %s' % (name, dshape_from_dtype(dtype))
+                             for (name, dtype, _) in columns)
+
+
+def _pretty_typename(name):
+    pretty = _CAMEL1.sub(r'\1_\2', name)
+    pretty = _CAMEL2.sub(r'\1_\2', pretty).lower()
+    return _MODSUF.sub('', pretty)
+
 
 class ModuleMeta(ABCMeta):
     """Module metaclass is needed to collect the input parameter list
-    in the field ``all_parameters''.
+    in the field ``all_parameters'' and to compute the pretty type name
+    of the class once.
     """
     def __init__(cls, name, bases, attrs):
         if "parameters" not in attrs:
@@ -43,25 +81,37 @@ class ModuleMeta(ABCMeta):
         for base in bases:
             all_props += getattr(base, "all_parameters", [])
         cls.all_parameters = all_props
+        cls._pretty_typename = _pretty_typename(name)
+        cls._params_dshape = _columns_dshape(all_props)
         super(ModuleMeta, cls).__init__(name, bases, attrs)
 
 
-@six.python_2_unicode_compatible
-class Module(six.with_metaclass(ModuleMeta, object)):
+class Module(metaclass=ModuleMeta):
     """The Module class is the base class for all the progressive modules.
     """
+    __slots__ = ('_args', '_kwds', '_scheduler', '_name', 'predictor',
+                 'storage', 'storagegroup', 'tracer', 'order', '_group',
+                 '_start_time', '_end_time', '_last_update', '_state',
+                 '_had_error', '_progress_cache', '_params', '_params_row',
+                 '_pending_params',
+                 '_input_slot_index', '_input_slot_arr', 'input_descriptors',
+                 '_required_inputs', '_connected_inputs',
+                 '_output_slots', 'output_descriptors', '_required_outputs',
+                 'default_step_size', 'input', 'output', 'steps_acc',
+                 '_start_run', '_end_run', '_synchronized_lock',
+                 '_run_step_ret', '_quantum', '_debug')
     parameters = [('quantum', np.dtype(float), .5),
                   ('debug', np.dtype(bool), False)]
     TRACE_SLOT = '_trace'
     PARAMETERS_SLOT = '_params'
 
-    state_created = 0
-    state_ready = 1
-    state_running = 2
-    state_blocked = 3
-    state_zombie = 4
-    state_terminated = 5
-    state_invalid = 6
+    state_created = _ST_CREATED
+    state_ready = _ST_READY
+    state_running = _ST_RUNNING
+    state_blocked = _ST_BLOCKED
+    state_zombie = _ST_ZOMBIE
+    state_terminated = _ST_TERMINATED
+    state_invalid = _ST_INVALID
     state_name = ['created', 'ready', 'running', 'blocked',
                   'zombie', 'terminated', 'invalid']
 
@@ -88,6 +138,8 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         self._scheduler = scheduler
         if name is None:
             name = self._scheduler.generate_name(self.pretty_typename())
+        # names are used as keys in many dictionaries
+        name = sys.intern(name)
         if self._scheduler.exists(name):
             raise ProgressiveError('module already exists in scheduler,'
                                    ' delete it first')
@@ -122,15 +174,30 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         self._last_update = 0
         self._state = Module.state_created
         self._had_error = False
+        self._progress_cache = (None, None)
         self._parse_parameters(kwds)
-        self._input_slots = self._validate_descriptors(input_descriptors)
+        # input slots are stored in a list, indexed through their name
+        self._input_slot_index = {
+            name: i for (i, name) in
+            enumerate(self._validate_descriptors(input_descriptors))}
+        self._input_slot_arr = [None] * len(self._input_slot_index)
+        self._connected_inputs = 0
         self.input_descriptors = {d.name: d for d in input_descriptors}
+        self._required_inputs = tuple(d.name for d in input_descriptors
+                                      if d.required)
         self._output_slots = self._validate_descriptors(output_descriptors)
         self.output_descriptors = {d.name: d for d in output_descriptors}
+        self._required_outputs = tuple(d.name for d in output_descriptors
+                                       if d.required)
         self.default_step_size = 100
         self.input = InputSlots(self)
         self.output = OutputSlots(self)
         self.steps_acc = 0
+        self._run_step_ret = {'next_state': Module.state_ready,
+                              'steps_run': 0,
+                              'reads': 0,
+                              'updates': 0,
+                              'creates': 0}
         # callbacks
         self._start_run = None
         self._end_run = None
@@ -145,28 +212,34 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         """
         pass
 
-    def get_progress(self):
+    def get_progress(self, run_number=None):
         """Return a tuple of numbers (current,total) where current is `current`
         progress value and `total` is the total number of values to process;
         these values can change during the computations.
+
+        When `run_number` is specified, the result is cached for that run.
         """
-        if not self.has_any_input():
-            return (0, 0)
-        slots = self.input_slot_values()
-        progresses = []
-        for slot in slots:
-            if slot is not None:
-                progresses.append(slot.output_module.get_progress())
-        if len(progresses) == 1:
-            return progresses[0]
-        elif not progresses:
+        if run_number is not None and \
+           self._progress_cache[0] == run_number:
+            return self._progress_cache[1]
+        if self._connected_inputs == 0:
             return (0, 0)
         pos = 0
         size = 0
-        for prog in progresses:
-            pos += prog[0]
-            size += prog[1]
-        return (pos, size)
+        count = 0
+        progress = (0, 0)
+        for slot in self._input_slot_arr:
+            if slot is None:
+                continue
+            progress = slot.output_module.get_progress(run_number)
+            pos += progress[0]
+            size += progress[1]
+            count += 1
+        if count > 1:
+            progress = (pos, size)
+        if run_number is not None:
+            self._progress_cache = (run_number, progress)
+        return progress
 
     def get_quality(self):
         # pylint: disable=no-self-use
@@ -177,14 +250,15 @@ class Module(six.with_metaclass(ModuleMeta, object)):
     def destroy(self):
         "Destroy the module, removing it from its scheduler"
         self.scheduler().remove_module(self)
-        # TODO remove connections with the input and output modules
+        # TODO remove connections with the output modules
 
     @staticmethod
     def _filter_kwds(kwds, function_or_method):
-        argspec = getfullargspec(function_or_method)
-        keys_ = argspec.args[len(argspec.args)-(0 if argspec.defaults is None
-                                                else len(argspec.defaults)):]
-        filtered_kwds = {k: kwds[k] for k in six.viewkeys(kwds) & keys_}
+        # bound methods are keyed on their function to avoid keeping
+        # their instance alive in the cache
+        keys_ = _keyword_args(getattr(function_or_method, '__func__',
+                                      function_or_method))
+        filtered_kwds = {k: kwds[k] for k in kwds.keys() & keys_}
         return filtered_kwds
 
     @staticmethod
@@ -207,7 +281,9 @@ class Module(six.with_metaclass(ModuleMeta, object)):
     @property
     def debug(self):
         "Return the value of the debug property"
-        return self.params.debug
+        if self._params_row is not None:
+            return bool(self._params_row.debug)
+        return self._debug
 
     @debug.setter
     def debug(self, value):
@@ -218,6 +294,7 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         """
         # TODO: should change the run_number of the params
         self.params.debug = bool(value)
+        self._debug = bool(value)
 
     @property
     def lock(self):
@@ -225,13 +302,51 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         return self._synchronized_lock
 
     def _parse_parameters(self, kwds):
+        # pylint: disable=no-member
+        # The parameter table is only created when it is accessed
+        self._params = None
+        self._params_row = None
+        self._pending_params = {name: kwds.pop(name)
+                                for (name, _, _) in self.all_parameters
+                                if name in kwds}
+        self._cache_params()
+
+    def _create_params(self):
         # pylint: disable=no-member
         self._params = _create_table(self.generate_table_name("params"),
-                                     self.all_parameters)
-        self.params = Row(self._params)
-        for (name, _, _) in self.all_parameters:
-            if name in kwds:
-                self.params[name] = kwds.pop(name)
+                                     self.all_parameters,
+                                     self._params_dshape)
+        self._params_row = Row(self._params)
+        for (name, value) in self._pending_params.items():
+            self._params_row[name] = value
+        self._pending_params = None
+        self._cache_params()
+
+    def _params_table(self):
+        if self._params is None:
+            self._create_params()
+        return self._params
+
+    @property
+    def params(self):
+        "Return the current parameters as a Row of the parameter table"
+        if self._params_row is None:
+            self._create_params()
+        return self._params_row
+
+    def _cache_params(self):
+        # quantum and debug of the parameters not created yet, once the
+        # params Row exists they are read from it since it can be written
+        if self._params_row is not None:
+            self._quantum = self._params_row.quantum
+            self._debug = bool(self._params_row.debug)
+            return
+        pending = self._pending_params
+        for (name, _, default) in self.all_parameters:
+            if name == 'quantum':
+                self._quantum = pending.get(name, default)
+            elif name == 'debug':
+                self._debug = bool(pending.get(name, default))
 
     def generate_table_name(self, name):
         "Return a uniq name for this module"
@@ -241,8 +356,17 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         "Return the timer associated with this module"
         return self._scheduler.timer()
 
-    def to_json(self, short=False, with_speed=True):
-        "Return a dictionary describing the module"
+    def to_json(self, short=False, with_speed=True, fields=None):
+        """Return a dictionary describing the module.
+
+        When `fields` is specified, only these entries of the short
+        description are computed, e.g. ``fields=('id', 'state')``.
+        """
+        if fields is not None:
+            try:
+                return {f: _JSON_FIELDS[f](self) for f in fields}
+            except KeyError as e:
+                raise ProgressiveError('Unknown json field %s' % e)
         s = self.scheduler()
         speed_h = [1.0]
         if with_speed:
@@ -266,19 +390,31 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         if short:
             return json
 
-        with self.lock:
+        # nothing changes the module while the scheduler is idle
+        lock = self.lock if s.is_running() else _NO_LOCK
+        with lock:
             json.update({
                 'start_time': self._start_time,
                 'end_time': self._end_time,
                 'input_slots': {k: _slot_to_json(s) for (k, s) in
-                                six.iteritems(self._input_slots)},
+                                self._input_slot_items()},
                 'output_slots': {k: _slot_to_json(s) for (k, s) in
-                                 six.iteritems(self._output_slots)},
+                                 self._output_slots.items()},
                 'default_step_size': self.default_step_size,
                 'parameters': self.current_params().to_json()
             })
         return json
 
+    @staticmethod
+    def to_json_bulk(modules, short=False):
+        "Return the list of the descriptions of the specified modules"
+        modules = list(modules)
+        if not modules:
+            return []
+        # run no module while serializing
+        with modules[0].scheduler().lock:
+            return [m.to_json(short=short) for m in modules]
+
     def to_dataflow(self):
         "Return a simple representation of the module in a dataflow."
         mod = {
@@ -289,7 +425,7 @@ class Module(six.with_metaclass(ModuleMeta, object)):
             'creation_args': self._args,
             'creation_kwds': self._kwds,
             'input_slots': {k: _slot_to_dataflow(s) for (k, s) in
-                            six.iteritems(self._input_slots) if s}
+                            self._input_slot_items() if s}
         }
 
         if self._group:
@@ -329,23 +465,18 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         print('end_time: %s' % self._end_time)
         print('last_update: %s' % self._last_update)
         print('state: %s(%d)' % (self.state_name[self._state], self._state))
-        print('input_slots: %s' % self._input_slots)
+        print('input_slots: %s' % dict(self._input_slot_items()))
         print('outpus_slots: %s' % self._output_slots)
         print('default_step_size: %d' % self.default_step_size)
-        if self._params:
-            print('parameters: ')
-            print(self._params)
+        print('parameters: ')
+        print(self._params_table())
 
     def pretty_typename(self):
         "Return a the type name of this module in a pretty form"
-        name = self.__class__.__name__
-        pretty = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
-        pretty = re.sub('([a-z0-9])([A-Z])', r'\1_\2', pretty).lower()
-        pretty = re.sub('_module$', '', pretty)
-        return pretty
+        return self._pretty_typename
 
     def __str__(self):
-        return six.u('Module %s: %s' % (self.__class__.__name__, self.name))
+        return 'Module %s: %s' % (self.__class__.__name__, self.name)
 
     def __repr__(self):
         return str(self)
@@ -384,19 +515,24 @@ class Module(six.with_metaclass(ModuleMeta, object)):
 
     def has_any_input(self):
         "Return True if the module has any input"
-        return any(self._input_slots.values())
+        return self._connected_inputs != 0
 
     def get_input_slot(self, name):
         "Return the specified input slot"
         # raises error is the slot is not declared
-        return self._input_slots[name]
+        return self._input_slot_arr[self._input_slot_index[name]]
 
     def get_input_module(self, name):
         "Return the specified input module"
         return self.get_input_slot(name).output_module
 
     def input_slot_values(self):
-        return list(self._input_slots.values())
+        "Return the live list of the input slots, None when not connected"
+        return self._input_slot_arr
+
+    def _input_slot_items(self):
+        arr = self._input_slot_arr
+        return ((name, arr[i]) for (name, i) in self._input_slot_index.items())
 
     def input_slot_type(self, name):
         return self.input_descriptors[name].type
@@ -405,25 +541,44 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         return self.input_descriptors[name].required
 
     def input_slot_names(self):
-        return list(self._input_slots.keys())
+        return list(self._input_slot_index.keys())
+
+    def required_input_slots(self):
+        "Return the connected input slots that are required"
+        get_input_slot = self.get_input_slot
+        return [slot for slot in (get_input_slot(name)
+                                  for name in self._required_inputs)
+                if slot is not None]
+
+    def _add_input_descriptor(self, desc):
+        "Declare a new input slot after the module creation"
+        self.input_descriptors[desc.name] = desc
+        self._input_slot_index[desc.name] = len(self._input_slot_arr)
+        self._input_slot_arr.append(None)
+        if desc.required:
+            self._required_inputs += (desc.name,)
 
     def _connect_input(self, slot):
-        ret = self.get_input_slot(slot.input_name)
-        self._input_slots[slot.input_name] = slot
+        index = self._input_slot_index[slot.input_name]
+        ret = self._input_slot_arr[index]
+        self._input_slot_arr[index] = slot
+        if ret is None:
+            self._connected_inputs += 1
         return ret
 
-    def _disconnect_input(self, slot):  # pragma no cover
-        pass
+    def _disconnect_input(self, slot):
+        index = self._input_slot_index[slot.input_name]
+        if self._input_slot_arr[index] is slot:
+            self._input_slot_arr[index] = None
+            self._connected_inputs -= 1
 
     def validate_inputs(self):
         # Only validate existence, the output code will test types
-        valid = True
-        for sd in self.input_descriptors.values():
-            slot = self._input_slots[sd.name]
-            if sd.required and slot is None:
-                logger.error('Missing inputs slot %s in %s', sd.name, self.name)
-                valid = False
-        return valid
+        for name in self._required_inputs:
+            if self.get_input_slot(name) is None:
+                logger.error('Missing inputs slot %s in %s', name, self.name)
+                return False
+        return True
 
     def has_any_output(self):
         return any(self._output_slots.values())
@@ -436,19 +591,21 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         return self.output_descriptors[name].type
 
     def output_slot_values(self):
-        return list(self._output_slots.values())
+        "Return a live view of the output slot lists, None when not connected"
+        return self._output_slots.values()
 
     def output_slot_names(self):
         return list(self._output_slots.keys())
 
     def validate_outputs(self):
         valid = True
-        for sd in self.output_descriptors.values():
-            slots = self._output_slots[sd.name]
-            if sd.required and (slots is None or len(slots) == 0):
+        output_slots = self._output_slots
+        for name in self._required_outputs:
+            if not output_slots[name]:
                 logger.error('Missing required output slot %s in %s',
-                             sd.name, self.name)
+                             name, self.name)
                 valid = False
+        for slots in output_slots.values():
             if slots:
                 for slot in slots:
                     if not slot.validate_types():
@@ -464,7 +621,11 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         return slot_list
 
     def _disconnect_output(self, slot):
-        pass
+        slot_list = self._output_slots.get(slot.output_name)
+        if slot_list and slot in slot_list:
+            slot_list.remove(slot)
+            if not slot_list:
+                self._output_slots[slot.output_name] = None
 
     def validate_inouts(self):
         return self.validate_inputs() and self.validate_outputs()
@@ -480,7 +641,7 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         if name == Module.TRACE_SLOT:
             return self.tracer.trace_stats()
         elif name == Module.PARAMETERS_SLOT:
-            return self._params
+            return self._params_table()
         return None
 
     @abstractmethod
@@ -502,19 +663,27 @@ class Module(six.with_metaclass(ModuleMeta, object)):
 
     def _return_run_step(self, next_state, steps_run,
                          reads=0, updates=0, creates=0):
-        assert (next_state >= Module.state_ready and
-                next_state <= Module.state_zombie)
+        """Return the dictionary expected from run_step.
+
+        The same dictionary is reused for all the steps of a module, callers
+        should not keep it across calls.
+        """
+        if next_state not in _VALID_NEXT:
+            raise ProgressiveError('Invalid next state %s in module %s'
+                                   % (next_state, self.name))
         self.steps_acc += steps_run
         if creates and updates == 0:
             updates = creates
         elif creates > updates:
             raise ProgressiveError('More creates (%d) than updates (%d)',
                                    creates, updates)
-        return {'next_state': next_state,
-                'steps_run': steps_run,
-                'reads': reads,
-                'updates': updates,
-                'creates': creates}
+        ret = self._run_step_ret
+        ret['next_state'] = next_state
+        ret['steps_run'] = steps_run
+        ret['reads'] = reads
+        ret['updates'] = updates
+        ret['creates'] = creates
+        return ret
 
     def is_visualization(self):
         return False
@@ -523,42 +692,40 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         return None
 
     def is_created(self):
-        return self._state == Module.state_created
+        return self._state == _ST_CREATED
 
     def is_running(self):
-        return self._state == Module.state_running
+        return self._state == _ST_RUNNING
 
     def is_ready(self):
-        if self.state == Module.state_zombie:
-            logger.info("%s Not ready because it turned from zombie"
-                        " to terminated", self.name)
-            self.state = Module.state_terminated
-            return False
-        if self.state == Module.state_terminated:
-            logger.info("%s Not ready because it terminated", self.name)
-            return False
-        if self.state == Module.state_invalid:
-            logger.info("%s Not ready because it is invalid", self.name)
+        state = self._state
+        # Module is either a source or has buffered data to process
+        if state == _ST_READY:
+            return True
+        if state in _ST_DEAD:
+            if state == _ST_ZOMBIE:
+                logger.info("%s Not ready because it turned from zombie"
+                            " to terminated", self.name)
+                self.state = _ST_TERMINATED
+            elif state == _ST_TERMINATED:
+                logger.info("%s Not ready because it terminated", self.name)
+            else:
+                logger.info("%s Not ready because it is invalid", self.name)
             return False
         # source modules can be generators that
         # cannot run out of input, unless they decide so.
-        if not self.has_any_input():
-            return True
-
-        # Module is either a source or has buffered data to process
-        if self.state == Module.state_ready:
+        if self._connected_inputs == 0:
             return True
 
         # Module is waiting for some input, test if some is available
         # to let it run. If all the input modules are terminated,
         # the module is blocked, cannot run any more, so it is terminated
         # too.
-        if self.state == Module.state_blocked:
-            slots = self.input_slot_values()
+        if state == _ST_BLOCKED:
             in_count = 0
             term_count = 0
             ready_count = 0
-            for slot in slots:
+            for slot in self._input_slot_arr:
                 if slot is None:  # slot not required and not connected
                     continue
                 in_count += 1
@@ -571,20 +738,19 @@ class Module(six.with_metaclass(ModuleMeta, object)):
                 #              slot.output_name, ts)
                 if slot.has_buffered() or in_ts > ts:
                     ready_count += 1
-                elif (in_module.is_terminated() or
-                      in_module.state == Module.state_invalid):
+                elif in_module._state in (_ST_TERMINATED, _ST_INVALID):
                     term_count += 1
 
             # if all the input slot modules are terminated or invalid
             if not self.is_input() and in_count != 0 and term_count == in_count:
                 logger.info('%s becomes zombie because all its input slots'
                             ' are terminated', self.name)
-                self.state = Module.state_zombie
+                self.state = _ST_ZOMBIE
                 return False
             # sources are always ready, and when 1 is ready, the module is.
             return in_count == 0 or ready_count != 0
         logger.error("%s Not ready because is in weird state %s",
-                     self.name, self.state_name[self.state])
+                     self.name, self.state_name[state])
         return False
 
     def cleanup_run(self, run_number):
@@ -597,13 +763,13 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         return run_number  # keep pylint happy
 
     def is_zombie(self):
-        return self._state == Module.state_zombie
+        return self._state == _ST_ZOMBIE
 
     def is_terminated(self):
-        return self._state == Module.state_terminated
+        return self._state == _ST_TERMINATED
 
     def is_valid(self):
-        return self._state != Module.state_invalid
+        return self._state != _ST_INVALID
 
     @property
     def state(self):
@@ -614,10 +780,13 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         self.set_state(s)
 
     def set_state(self, s):
-        assert (s >= Module.state_created and
-                s <= Module.state_invalid), "State %s invalid in module %s" % (
-                    s, self.name)
+        if s not in _VALID_STATES:
+            raise ProgressiveError('State %s invalid in module %s'
+                                   % (s, self.name))
+        old = self._state
         self._state = s
+        if old != s and (old in _ST_COUNTED or s in _ST_COUNTED):
+            self._scheduler._state_changed(self, old, s)
 
     def trace_stats(self, max_runs=None):
         return self.tracer.trace_stats(max_runs)
@@ -677,32 +846,41 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         raise NotImplementedError('Updating parameters not implemented yet')
 
     def current_params(self):
-        return self._params.last()
+        return self._params_table().last()
 
     def set_current_params(self, v):
         with self.lock:
             current = self.current_params()
             combined = dict(current)
             combined.update(v)
-            self._params.add(combined)
+            self._params_table().add(combined)
+            self._cache_params()
         return v
 
     def run(self, run_number):
         if self.is_running():
             raise ProgressiveError('Module already running')
+        scheduler = self._scheduler
+        tracer = self.tracer
+        timer = scheduler.timer
+        typename = self.pretty_typename()
+        # checked once per run, the step loop is hot
+        log_debug = logger.isEnabledFor(logging.DEBUG)
         self.steps_acc = 0
-        next_state = self.state
+        next_state = self._state
         exception = None
-        now = self.timer()
-        quantum = self.scheduler().fix_quantum(self, self.params.quantum)
-        tracer = self.tracer
+        now = timer()
+        params_row = self._params_row
+        quantum = self._quantum if params_row is None else params_row.quantum
+        quantum = scheduler.fix_quantum(self, quantum, now)
         if quantum == 0:
             quantum = 0.1
             logger.error('Quantum is 0 in %s, setting it to a'
                          ' reasonable value', self.name)
-        self.state = Module.state_running
+        self.state = _ST_RUNNING
+        end_time = now + quantum
         self._start_time = now
-        self._end_time = self._start_time + quantum
+        self._end_time = end_time
         self._update_params(run_number)
 
         # TODO Forcing 3 steps, not sure, change when the predictor improves
@@ -711,21 +889,21 @@ class Module(six.with_metaclass(ModuleMeta, object)):
         run_step_ret = {'reads': 0, 'updates': 0, 'creates': 0}
         self.start_run(run_number)
         tracer.start_run(now, run_number)
-        while self._start_time < self._end_time:
-            remaining_time = self._end_time-self._start_time
-            if remaining_time <= 0:
-                logger.info('Late by %d s in module %s',
-                            remaining_time, self.pretty_typename())
-                break  # no need to try to squeeze anything
-            logger.debug('Time remaining: %f in module %s',
-                         remaining_time, self.pretty_typename())
-            step_size = self.predict_step_size(np.min([max_time,
-                                                       remaining_time]))
-            logger.debug('step_size=%d in module %s',
-                         step_size, self.pretty_typename())
+        # the loop test guarantees that remaining_time is positive
+        while self._start_time < end_time:
+            remaining_time = end_time - self._start_time
+            if log_debug:
+                logger.debug('Time remaining: %f in module %s',
+                             remaining_time, typename)
+            step_size = self.predict_step_size(min(max_time,
+                                                   remaining_time))
+            if log_debug:
+                logger.debug('step_size=%d in module %s',
+                             step_size, typename)
             if step_size == 0:
-                logger.debug('step_size of 0 in module %s',
-                             self.pretty_typename())
+                if log_debug:
+                    logger.debug('step_size of 0 in module %s',
+                                 typename)
                 break
             # pylint: disable=broad-except
             try:
@@ -736,18 +914,18 @@ class Module(six.with_metaclass(ModuleMeta, object)):
                                              step_size,
                                              remaining_time)
                 next_state = run_step_ret['next_state']
-                now = self.timer()
+                now = timer()
             except StopIteration:
                 logger.info('In Module.run(): Received a StopIteration')
-                next_state = Module.state_zombie
+                next_state = _ST_ZOMBIE
                 run_step_ret['next_state'] = next_state
-                now = self.timer()
+                now = timer()
                 break
             except Exception as e:
                 print_exc()
-                next_state = Module.state_zombie
+                next_state = _ST_ZOMBIE
                 run_step_ret['next_state'] = next_state
-                now = self.timer()
+                now = timer()
                 logger.debug("Exception in %s", self.name)
                 tracer.exception(now, run_number)
                 exception = e
@@ -756,24 +934,25 @@ class Module(six.with_metaclass(ModuleMeta, object)):
                 break
             finally:
                 assert (run_step_ret is not None), "Error: %s run_step_ret"\
-                  " not returning a dict" % self.pretty_typename()
+                  " not returning a dict" % typename
                 if self.debug:
-                    run_step_ret['debug'] = True
+                    run_step_ret = dict(run_step_ret, debug=True)
                 tracer.after_run_step(now, run_number, **run_step_ret)
                 self.state = next_state
-                logger.debug('Next step is %s in module %s',
-                             self.state_name[next_state],
-                             self.pretty_typename())
+                if log_debug:
+                    logger.debug('Next step is %s in module %s',
+                                 self.state_name[next_state],
+                                 typename)
 
-            if self._start_time is None or self.state != Module.state_ready:
+            if self._start_time is None or self._state != _ST_READY:
                 tracer.run_stopped(now, run_number)
                 break
             self._start_time = now
         self.state = next_state
-        if self.state == Module.state_zombie:
-            logger.debug('Module %s zombie', self.pretty_typename())
+        if next_state == _ST_ZOMBIE:
+            logger.debug('Module %s zombie', typename)
             tracer.terminated(now, run_number)
-        progress = self.get_progress()
+        progress = self.get_progress(run_number)
         tracer.end_run(now, run_number,
                        progress_current=progress[0], progress_max=progress[1],
                        quality=self.get_quality())
@@ -782,18 +961,42 @@ class Module(six.with_metaclass(ModuleMeta, object)):
             raise RuntimeError("{} {}".format(type(exception), exception))
 
 
+_NO_LOCK = FakeLock()
+
+_JSON_FIELDS = {
+    'is_running': lambda m: m.scheduler().is_running(),
+    'is_terminated': lambda m: m.scheduler().is_terminated(),
+    'run_number': lambda m: m.scheduler().run_number(),
+    'id': lambda m: m.name,
+    'classname': lambda m: m.pretty_typename(),
+    'is_visualization': lambda m: m.is_visualization(),
+    'last_update': lambda m: m.last_update(),
+    'state': lambda m: m.state_name[m.state],
+    'quality': lambda m: m.get_quality(),
+    'progress': lambda m: list(m.get_progress()),
+    'speed': lambda m: m.tracer.get_speed(),
+    'order': lambda m: m.order
+}
+
+
 def _print_len(x):
     if x is not None:
         print(len(x))
+# only reads the length of its argument, no need to lock it
+_print_len.no_lock = True
 
 
 class Every(Module):
     "Module running a function at eatch iteration"
+    __slots__ = ('_proc', '_constant_time', '_lock_proc')
+
     def __init__(self, proc=_print_len, constant_time=True, **kwds):
         self._add_slots(kwds, 'input_descriptors', [SlotDescriptor('df')])
         super(Every, self).__init__(**kwds)
         self._proc = proc
         self._constant_time = constant_time
+        # procs can declare that they do not need the slot lock
+        self._lock_proc = not getattr(proc, 'no_lock', False)
 
     def predict_step_size(self, duration):
         if self._constant_time:
@@ -805,9 +1008,13 @@ class Every(Module):
         df = slot.data()
         reads = 0
         if df is not None:
-            with slot.lock:
+            if self._lock_proc:
+                with slot.lock:
+                    reads = len(df)
+                    #with self.scheduler().stdout_parent():
+                    self._proc(df)
+            else:
                 reads = len(df)
-                #with self.scheduler().stdout_parent():
                 self._proc(df)
         return self._return_run_step(Module.state_blocked, steps_run=1,
                                      reads=reads)
@@ -819,6 +1026,8 @@ def _prt(x):
 
 class Print(Every):
     "Module to print its input slot"
+    __slots__ = ()
+
     def __init__(self, **kwds):
         if 'proc' not in kwds:
             kwds['proc'] = _prt
@@ -838,15 +1047,10 @@ def _slot_to_dataflow(slot):
         return [_slot_to_dataflow(s) for s in slot]
     return (slot.output_module.name, slot.output_name)
 
-def _create_table(tname, columns):
-    dshape = ""
-    data = {}
-    for (name, dtype, val) in columns:
-        if dshape:
-            dshape += ','
-        dshape += '%s: %s'%(name, dshape_from_dtype(dtype))
-        data[name] = val
-    dshape = '{'+dshape+'}'
+def _create_table(tname, columns, dshape=None):
+    if dshape is None:
+        dshape = _columns_dshape(columns)
+    data = {name: val for (name, _, val) in columns}
     table = Table(tname, dshape=dshape, storagegroup=Group.default_internal(tname))
     table.add(data)
     return table
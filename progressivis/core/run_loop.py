@@ -0,0 +1,33 @@
+"""
+Inner dispatch loop of the scheduler, run once per module and per tick.
+
+This module is pure Python so it can be compiled by Cython (see setup.py),
+the .py remains the fallback when the extension is not built.
+"""
+
+
+def run_loop(scheduler):
+    "Run the modules yielded by the scheduler until it stops."
+    # pylint: disable=protected-access
+    lock = scheduler.lock
+    hibernate = scheduler._hibernate
+    no_more_data = scheduler.no_more_data
+    all_blocked = scheduler.all_blocked
+    is_waiting_for_input = scheduler.is_waiting_for_input
+    has_input = scheduler.has_input
+    consider_module = scheduler._consider_module
+    run_tick_procs = scheduler._run_tick_procs
+    for module in scheduler._next_module():
+        if no_more_data() and all_blocked() and is_waiting_for_input():
+            if not scheduler._keep_running:
+                hibernate()
+        if scheduler._keep_running:
+            scheduler._keep_running -= 1
+        in_input = has_input()
+        if not (consider_module(module, in_input) and
+                (module.is_ready() or in_input)):
+            continue
+        scheduler._run_number += 1
+        run_tick_procs()
+        with lock:
+            module.run(scheduler._run_number)
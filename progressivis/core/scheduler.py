@@ -72,5 +72,14 @@ class Scheduler(BaseScheduler):
     def done(self):
         self.thread = None
 
+
+class _DefaultScheduler(object):
+    """Descriptor creating the default scheduler on first access,
+    so that importing progressivis does not create a scheduler."""
+    # pylint: disable=too-few-public-methods
+    def __get__(self, instance, owner):
+        BaseScheduler.default = Scheduler()
+        return BaseScheduler.default
+
 if BaseScheduler.default is None:
-    BaseScheduler.default = Scheduler()
+    BaseScheduler.default = _DefaultScheduler()
@@ -2,24 +2,17 @@
 Base Scheduler class, runs progressive modules.
 """
 from __future__ import absolute_import, division, print_function
+import sys
 import time
 import logging
-import functools
-from copy import copy
 #from collections import deque
-from collections import Iterable
+from collections import Iterable, OrderedDict
 from timeit import default_timer
-from uuid import uuid4
-import six
 
-from scipy.sparse import csr_matrix
-from scipy.sparse.csgraph import shortest_path
-import numpy as np
-
-
-from .utils import ProgressiveError, AttributeDict, FakeLock, Condition
+from .utils import ProgressiveError, AttributeDict, FakeLock, Event
 from .synchronized import synchronized
-from .toposort import toposort
+from .toposort import toposort, toposort_kahn, DynamicToposort
+from .run_loop import run_loop
 
 
 logger = logging.getLogger(__name__)
@@ -27,6 +20,9 @@ logger = logging.getLogger(__name__)
 __all__ = ['BaseScheduler']
 
 KEEP_RUNNING = 5
+TOPO_CACHE_SIZE = 8
+# number of bits freed by removed modules before the masks are renumbered
+FREED_BITS_THRESHOLD = 64
 
 class _InteractionOpts(object):
     def __init__(self, starving_mods=None, max_time=None, max_iter=None):
@@ -57,6 +53,7 @@ class BaseScheduler(object):
             self._name = BaseScheduler._last_id
         self._modules = dict()
         self._module = AttributeDict(self._modules)
+        self._prefix_counter = {}
         self._running = False
         self._runorder = None
         self._stopped = False
@@ -68,16 +65,38 @@ class BaseScheduler(object):
         self._idle_procs = []
         self._new_modules_ids = []
         self._slots_updated = False
-        self._run_list = []
+        self._run_list = ()
+        self._run_set = frozenset()
+        # counters over the run list
+        self._blocked_count = 0
+        self._terminated_count = 0
+        self._input_count = 0
+        self._data_input_count = 0
         self._run_index = 0
         self._module_selection = None
         self._selection_target_time = -1
         self.interaction_latency = interaction_latency
         self._reachability = {}
+        # each module name owns a bit for the reachability masks
+        self._bits = {}
+        self._next_bit = 0
+        self._freed_bits = 0
+        self._order_cache = None
+        self._deps_cache = None
+        self._required_deps_cache = None
+        self._topo_cache = OrderedDict()
+        self._pred = {}
+        self._succ = {}
+        self._cyclic = False
+        # order maintained incrementally while the dataflow is acyclic
+        self._dyntopo = DynamicToposort()
+        self._dyntopo_valid = True
         self._start_inter = 0
         self._inter_cycles_cnt = 0
         self._interaction_opts = None
-        self._hibernate_cond = Condition()
+        # set to wake up the scheduler, only when it is hibernating
+        self._hibernate_event = Event()
+        self._hibernating = False
         self._keep_running = KEEP_RUNNING
 
     def set_interaction_opts(self, starving_mods=None, max_time=None, max_iter=None):
@@ -109,16 +128,17 @@ class BaseScheduler(object):
             return
         if self._interaction_opts.starving_mods:
             if not sum([mod.steps_acc for mod in self._interaction_opts.starving_mods]):
-                print("Exiting shortcut mode because data "
-                      "inputs on witnesses are dried",
-                      self._interaction_opts.starving_mods)
+                logger.debug("Exiting shortcut mode because data "
+                             "inputs on witnesses are dried %s",
+                             self._interaction_opts.starving_mods)
                 self._module_selection = None
                 self._inter_cycles_cnt = 0
                 return
         if self._interaction_opts.max_time:
             duration = default_timer()-self._start_inter
             if  duration >= self._interaction_opts.max_time:
-                print("Exiting shortcut mode on time out, duration: ", duration)
+                logger.debug("Exiting shortcut mode on time out,"
+                             " duration: %s", duration)
                 self._module_selection = None
                 self._inter_cycles_cnt = 0
                 return
@@ -127,7 +147,8 @@ class BaseScheduler(object):
             if self._inter_cycles_cnt >= self._interaction_opts.max_iter:
                 self._module_selection = None
                 self._inter_cycles_cnt = 0
-                print("Exiting shortcut mode after ", self._interaction_opts.max_iter, " cycles")
+                logger.debug("Exiting shortcut mode after %s cycles",
+                             self._interaction_opts.max_iter)
             else:
                 self._inter_cycles_cnt += 1
         
@@ -169,12 +190,13 @@ class BaseScheduler(object):
         """Return all the vsualizations reachable from
         the specified list of input modules.
         """
-        reachable = set()
         if not inputs:
             return set()
         # collect all modules reachable from the modified inputs
+        mask = 0
         for i in inputs:
-            reachable.update(self._reachability[i])
+            mask |= self._reachability[i]
+        reachable = self._mask_names(mask)
         all_vis = self.get_visualizations()
         reachable_vis = reachable.intersection(all_vis)
         if reachable_vis:
@@ -185,86 +207,181 @@ class BaseScheduler(object):
     def order_modules(self):
         """Compute a topological order for the modules.
         Should do something smarted with exceptions.
+
+        The order is cached until the dataflow changes.
         """
-        runorder = None
-        try:
-            dependencies = self._collect_dependencies()
-            runorder = toposort(dependencies)
-            #print('normal order of', dependencies, 'is', runorder, file=sys.stderr)
-            self._compute_reachability(dependencies)
-        except ValueError:  # cycle, try to break it then
-            # if there's still a cycle, we cannot run the first cycle
-            # TODO fix this
+        if self._order_cache is not None:
+            return self._order_cache
+        dependencies = self._collect_dependencies()
+        signature = None
+        if not self._cyclic:
+            # the same dataflow may come back, e.g. after slots_updated()
+            # without an actual change of the graph
+            signature = frozenset(
+                (mid, type(self._modules[mid]), frozenset(deps))
+                for (mid, deps) in dependencies.items())
+            cached = self._topo_cache.get(signature)
+            if cached is not None:
+                self._topo_cache.move_to_end(signature)
+                (runorder, self._reachability) = cached
+                self._order_cache = runorder
+                return runorder
+        if self._dyntopo_valid:
+            vertices = set(dependencies)
+            for deps in dependencies.values():
+                vertices.update(deps)
+            runorder = self._dyntopo.sort(vertices)
+            remaining = None
+        else:
+            (runorder, remaining) = toposort_kahn(dependencies)
+            if not remaining and len(runorder) == len(self._modules):
+                # restart the incremental order from a complete one
+                self._dyntopo.reset(runorder)
+                self._dyntopo_valid = True
+        self._cyclic = bool(remaining)
+        if remaining:  # cycle, try to break it then
+            # cycles of required slots are rejected when connecting,
+            # only the modules left out need to be sorted again
             logger.info('Cycle in module dependencies, '
                         'trying to drop optional fields')
-            dependencies = self._collect_dependencies(only_required=True)
-            runorder = toposort(dependencies)
-            #print('Filtered order of', dependencies, 'is', runorder, file=sys.stderr)
-            self._compute_reachability(dependencies)
+            signature = None
+            remaining = set(remaining)
+            required = self._collect_dependencies(only_required=True)
+            dependencies = dict(dependencies)
+            cycle_deps = {}
+            for mid in remaining:
+                cycle_deps[mid] = required[mid] & remaining
+                dependencies[mid] = ((dependencies[mid] - remaining) |
+                                     cycle_deps[mid])
+            runorder.extend(toposort(cycle_deps))
+        successors = None
+        if not remaining and len(dependencies) == len(self._modules):
+            # the successors maintained by the scheduler match the graph
+            successors = self._succ
+        self._compute_reachability(dependencies, runorder, successors)
+        self._order_cache = runorder
+        if signature is not None:
+            self._topo_cache[signature] = (runorder, self._reachability)
+            if len(self._topo_cache) > TOPO_CACHE_SIZE:
+                self._topo_cache.popitem(last=False)
         return runorder
 
+    def _invalidate_order(self):
+        "Forget the cached order and dependencies after a dataflow change"
+        self._order_cache = None
+        self._deps_cache = None
+        self._required_deps_cache = None
+
     @synchronized
     def _collect_dependencies(self, only_required=False):
-        dependencies = {}
-        for (mid, module) in six.iteritems(self._modules):
-            if not module.is_valid():
-                continue
-            outs = [m.output_module.name for m in module.input_slot_values()
-                    if m and (not only_required or
-                              module.input_slot_required(m.input_name))]
-            dependencies[mid] = set(outs)
-        return dependencies
-
-    def _compute_reachability(self, dependencies):
-        # pylint: disable=too-many-locals
-        k = list(dependencies.keys())
-        size = len(k)
-        index = dict(zip(k, range(size)))
-        row = []
-        col = []
-        data = []
-        for (vertex1, vertices) in six.iteritems(dependencies):
-            for vertex2 in vertices:
-                col.append(index[vertex1])
-                row.append(index[vertex2])
-                data.append(1)
-        mat = csr_matrix((data, (row, col)), shape=(size, size))
-        dist = shortest_path(mat,
-                             directed=True,
-                             return_predecessors=False,
-                             unweighted=True)
-        self._reachability = {}
-        reach_no_vis = set()
+        """Return a dictionary mapping each valid module name to the set
+        of module names it depends on, through required slots only if
+        `only_required` is set. The dictionaries are cached until the
+        dataflow changes and should not be modified."""
+        if only_required:
+            if self._required_deps_cache is None:
+                self._required_deps_cache = {
+                    mid: set(s.output_module.name
+                             for s in module.required_input_slots())
+                    for (mid, module) in self._modules.items()
+                    if module.is_valid()}
+            return self._required_deps_cache
+        if self._deps_cache is None:
+            pred = self._pred
+            self._deps_cache = {mid: pred[mid]
+                                for (mid, module) in self._modules.items()
+                                if module.is_valid()}
+        return self._deps_cache
+
+    def _compute_reachability(self, dependencies, runorder, successors=None):
+        # Transitive closure of the DAG: walking the topological order
+        # backwards, the successors of a vertex are complete when it is seen.
+        # Reachable sets are int bitmasks, see _module_bit
+        if successors is None:
+            successors = {vertex: [] for vertex in runorder}
+            for (vertex, vertices) in dependencies.items():
+                for dep in vertices:
+                    successors[dep].append(vertex)
+        # a module reaches a visualization if it is one or if one of its
+        # successors reaches one, computed in the same pass
         all_vis = set(self.get_visualizations())
-        for index1 in range(size):
-            vertex1 = k[index1]
-            s = {vertex1}
-            for index2 in range(size):
-                vertex2 = k[index2]
-                dst = dist[index1, index2]
-                if dst != 0 and dst != np.inf:
-                    s.add(vertex2)
-            self._reachability[vertex1] = s
-            if not all_vis.intersection(s):
-                logger.info('No visualization after module %s: %s', vertex1, s)
-                reach_no_vis.update(s)
-                if not self.module[vertex1].is_visualization():
-                    reach_no_vis.add(vertex1)
-        logger.info('Module(s) %s always after visualizations', reach_no_vis)
+        reachability = {}
+        reach_no_vis = 0
+        for vertex in reversed(runorder):
+            bit = self._module_bit(vertex)
+            mask = bit
+            reaches_vis = vertex in all_vis
+            for succ in successors[vertex]:
+                mask |= reachability[succ]
+                reaches_vis = reaches_vis or not reach_no_vis & self._bits[succ]
+            reachability[vertex] = mask
+            if not reaches_vis:
+                logger.info('No visualization after module %s: %s',
+                            vertex, self._mask_names(mask))
+                reach_no_vis |= bit
+        logger.info('Module(s) %s always after visualizations',
+                    self._mask_names(reach_no_vis))
         # filter out module that reach no vis
-        for (k, v) in six.iteritems(self._reachability):
-            v.difference_update(reach_no_vis)
+        self._reachability = {k: v & ~reach_no_vis
+                              for (k, v) in reachability.items()}
         logger.info('reachability map: %s', self._reachability)
 
+    def _module_bit(self, mid):
+        """Return the bit of a module name in the reachability masks.
+        The bits are kept when the order changes so the masks remain valid."""
+        bit = self._bits.get(mid)
+        if bit is None:
+            bit = 1 << self._next_bit
+            self._next_bit += 1
+            self._bits[mid] = bit
+        return bit
+
+    def _free_module_bit(self, mid):
+        """Release the bit of a removed module. The bits are not reused
+        until they are renumbered, the cached masks may still contain them."""
+        if self._bits.pop(mid, None) is None:
+            return
+        # the orders cached with the module would be reused if it comes
+        # back with the same dataflow, with masks missing its new bit
+        for (signature, (_, reachability)) in list(self._topo_cache.items()):
+            if mid in reachability:
+                del self._topo_cache[signature]
+        self._freed_bits += 1
+        if self._freed_bits > FREED_BITS_THRESHOLD:
+            self._compact_bits()
+
+    def _compact_bits(self):
+        "Renumber the bits of the modules densely, dropping the freed bits"
+        remap = {}
+        for (i, (mid, bit)) in enumerate(list(self._bits.items())):
+            remap[bit] = 1 << i
+            self._bits[mid] = 1 << i
+
+        def convert(mask):
+            ret = 0
+            for (old, new) in remap.items():
+                if mask & old:
+                    ret |= new
+            return ret
+        self._next_bit = len(self._bits)
+        self._freed_bits = 0
+        self._topo_cache.clear()  # its masks use the old bits
+        self._reachability = {mid: convert(mask)
+                              for (mid, mask) in self._reachability.items()
+                              if mid in self._bits}
+        if self._module_selection:
+            self._module_selection = convert(self._module_selection)
+
+    def _mask_names(self, mask):
+        "Return the set of module names in a reachability mask"
+        return {mid for (mid, bit) in self._bits.items() if mask & bit}
+
     @staticmethod
-    def _module_order(x, y):
-        if 'order' in x:
-            if 'order' in y:
-                return x['order']-y['order']
-            return 1
-        if 'order' in y:
-            return -1
-        return 0
+    def _module_order(json):
+        # modules not ordered yet come first
+        if 'order' in json:
+            return (1, json['order'])
+        return (0, 0)
 
     def run_queue_length(self):
         "Return the length of the run queue"
@@ -272,13 +389,12 @@ class BaseScheduler(object):
 
     def to_json(self, short=True):
         "Return a dictionary describing the scheduler"
+        from .module import Module
         msg = {}
-        mods = {}
         with self.lock:
-            for (name, module) in six.iteritems(self.modules()):
-                mods[name] = module.to_json(short=short)
-        mods = mods.values()
-        modules = sorted(mods, key=functools.cmp_to_key(self._module_order))
+            mods = Module.to_json_bulk(list(self.modules().values()),
+                                       short=short)
+        modules = sorted(mods, key=self._module_order)
         msg['modules'] = modules
         msg['is_valid'] = self.is_valid()
         msg['is_running'] = self.is_running()
@@ -291,19 +407,19 @@ class BaseScheduler(object):
         "Return a simple representation of the dataflow."
         flow = {}
         with self.lock:
-            for (name, module) in six.iteritems(self.modules()):
+            for (name, module) in self.modules().items():
                 flow[name] = module.to_dataflow()
         return flow
 
     def validate(self):
         "Validate the scheduler, returning True if it is valid."
         if not self._valid:
-            valid = True
-            for module in self._modules.values():
-                if not module.validate():
-                    logger.error('Cannot validate module %s', module.name)
-                    valid = False
-            self._valid = valid
+            invalid = [module.name for module in self._modules.values()
+                       if not module.validate()]
+            if invalid:
+                logger.error('Cannot validate %d module(s): %s',
+                             len(invalid), ', '.join(invalid))
+            self._valid = not invalid
         return self._valid
 
     def is_valid(self):
@@ -372,6 +488,7 @@ class BaseScheduler(object):
     def slots_updated(self):
         "Set by slot when it has been correctly updated"
         self._slots_updated = True
+        self._invalidate_order()
 
     def run(self):
         "Run the modules, called by start()."
@@ -391,19 +508,7 @@ class BaseScheduler(object):
 
     def _run_loop(self):
         """Main scheduler loop."""
-        # pylint: disable=broad-except
-        for module in self._next_module():
-            if self.no_more_data() and self.all_blocked() and self.is_waiting_for_input():
-                if not self._keep_running:
-                    with self._hibernate_cond:
-                        self._hibernate_cond.wait()
-            if self._keep_running: self._keep_running -= 1
-            if not (self._consider_module(module) and (module.is_ready() or self.has_input())):
-                continue
-            self._run_number += 1
-            with self.lock:
-                self._run_tick_procs() 
-                module.run(self._run_number)
+        run_loop(self)
 
     def _next_module(self):
         """Yields a possibly infinite sequence of modules.
@@ -426,13 +531,15 @@ class BaseScheduler(object):
             # Check for interactive input mode
             if input_mode != self.has_input():
                 if input_mode: # end input mode
-                    print('Ending interactive mode after', default_timer()-self._start_inter)
+                    logger.debug('Ending interactive mode after %s',
+                                 default_timer()-self._start_inter)
                     self._start_inter = 0
                     self._inter_cycles_cnt = 0
                     input_mode = False
                 else:
                     self._start_inter = default_timer()
-                    print('Starting interactive mode at', self._start_inter)
+                    logger.debug('Starting interactive mode at %s',
+                                 self._start_inter)
                     input_mode = True
                 # Restart from beginning
                 self._run_index = 0
@@ -448,52 +555,71 @@ class BaseScheduler(object):
         return self._new_modules_ids or self._slots_updated
     
     def all_blocked(self):
-        from .module import Module
-        for m in self._run_list:
-            if m.state != Module.state_blocked:
-                return False
-        return True
-    
+        return self._blocked_count == len(self._run_list)
+
     def is_waiting_for_input(self):
-        for m in self._run_list:
-            if m.is_input():
-                return True
-        return False
-    
+        return self._input_count != 0
+
     def no_more_data(self):
-        for m in self._run_list:
-            if m.is_data_input():
-                return False
-        return True
-    
+        return self._data_input_count == 0
+
+    def _set_run_list(self, run_list):
+        from .module import Module
+        self._run_list = run_list
+        self._run_set = frozenset(run_list)
+        self._blocked_count = sum(1 for m in run_list
+                                  if m.state == Module.state_blocked)
+        self._terminated_count = sum(1 for m in run_list
+                                     if m.state == Module.state_terminated)
+        self._input_count = sum(1 for m in run_list if m.is_input())
+        self._data_input_count = sum(1 for m in run_list
+                                     if m.is_data_input())
+
+    def _state_changed(self, module, old, new):
+        """Called by a module entering or leaving the blocked or
+        the terminated state"""
+        from .module import Module
+        if module not in self._run_set:
+            return
+        if old == Module.state_blocked:
+            self._blocked_count -= 1
+        elif old == Module.state_terminated:
+            self._terminated_count -= 1
+        if new == Module.state_blocked:
+            self._blocked_count += 1
+        elif new == Module.state_terminated:
+            self._terminated_count += 1
+
     def _update_modules(self):
         if self._new_modules_ids:
-            # Make a shallow copy of the current run order;
-            # if we cannot validate the new state, revert to the copy
-            prev_run_list = copy(self._run_list)
+            # The run list is immutable, keep it to revert to it
+            # if we cannot validate the new state
+            prev_run_list = self._run_list
             for mid in self._new_modules_ids:
                 self._modules[mid].starting()
             self._new_modules_ids = []
             self._slots_updated = False
             with self.lock:
-                self._run_list = []
-                self._runorder = self.order_modules()
-                for i, mid in enumerate(self._runorder):
-                    module = self._modules[mid]
-                    self._run_list.append(module)
+                runorder = tuple(self.order_modules())
+                run_list = tuple(self._modules[mid] for mid in runorder)
+                for i, module in enumerate(run_list):
                     module.order = i
+                # swap in the new snapshot
+                self._runorder = runorder
+                self._set_run_list(run_list)
             if not self.validate():
                 logger.error("Cannot validate progressive workflow,"
                              " reverting to previous")
-                self._run_list = prev_run_list
+                self._set_run_list(prev_run_list)
 
     def _end_of_modules(self, first_run):
         # Reset interaction mode
         #import pdb;pdb.set_trace()
         self._proc_interaction_opts()
         self._selection_target_time = -1
-        new_list = [m for m in self._run_list if not m.is_terminated()]
-        self._run_list = new_list
+        if self._terminated_count:
+            self._set_run_list(tuple(m for m in self._run_list
+                                     if not m.is_terminated()))
         if first_run == self._run_number: # no module ready
             has_run = False
             for proc in self._idle_procs:
@@ -511,24 +637,42 @@ class BaseScheduler(object):
 
     def _run_tick_procs(self):
         #pylint: disable=broad-except
-        for proc in self._tick_procs:
+        # Snapshot the procs under the lock, call them without holding it
+        with self.lock:
+            procs = tuple(self._tick_procs)
+            once_procs = self._tick_once_procs
+            if once_procs:
+                self._tick_once_procs = []
+        for proc in procs:
             logger.debug('Calling tick_proc')
             try:
                 proc(self, self._run_number)
             except Exception as exc:
                 logger.warning(exc)
-        for proc in self._tick_once_procs:
+        for proc in once_procs:
             try:
                 proc()
             except Exception as exc:
                 logger.warning(exc)
-            self._tick_once_procs = []
+
+    def _hibernate(self):
+        "Wait until the scheduler is woken up by for_input or stop."
+        event = self._hibernate_event
+        event.clear()
+        self._hibernating = True
+        # checked again after clearing, a wake up may have been missed
+        if not self._keep_running:
+            event.wait()
+        self._hibernating = False
+
+    def _wake_up(self):
+        self._keep_running = KEEP_RUNNING
+        if self._hibernating:
+            self._hibernate_event.set()
 
     def stop(self):
         "Stop the execution."
-        with self._hibernate_cond:
-            self._keep_running = KEEP_RUNNING
-            self._hibernate_cond.notify()
+        self._wake_up()
         self._stopped = True
 
     def is_running(self):
@@ -555,12 +699,14 @@ class BaseScheduler(object):
 
     def generate_name(self, prefix):
         "Generate a name for a module."
-        # Try to be nice
-        for i in range(1, 10):
+        # Numbering resumes after the last name generated for the prefix
+        i = self._prefix_counter.get(prefix, 0) + 1
+        mid = '%s_%d' % (prefix, i)
+        while mid in self._modules:
+            i += 1
             mid = '%s_%d' % (prefix, i)
-            if mid not in self._modules:
-                return mid
-        return '%s_%s' % (prefix, uuid4())
+        self._prefix_counter[prefix] = i
+        return mid
 
     @synchronized
     def add_module(self, module):
@@ -569,12 +715,91 @@ class BaseScheduler(object):
             raise ProgressiveError('Cannot add running module %s' % module.name)
         if module.name is None:
             # pylint: disable=protected-access
-            module._name = self.generate_name(module.pretty_typename())
+            module._name = sys.intern(self.generate_name(module.pretty_typename()))
         self._add_module(module)
 
     def _add_module(self, module):
         self._new_modules_ids += [module.name]
         self._modules[module.name] = module
+        self._pred[module.name] = set()
+        self._succ[module.name] = set()
+        self._dyntopo.add_vertex(module.name)
+        self._invalidate_order()
+
+    @synchronized
+    def add_connections(self, connections):
+        """Connect several slots at once, holding the scheduler lock
+        for the whole batch.
+
+        Parameters
+        ----------
+        connections : iterable
+            Tuples (output_module, output_name, input_module, input_name).
+
+        Returns the list of connected slots.
+        """
+        slots = []
+        self.slots_updated()
+        try:
+            for (output_module, output_name,
+                 input_module, input_name) in connections:
+                slot = output_module.create_slot(output_name,
+                                                 input_module, input_name)
+                # pylint: disable=protected-access
+                slot._connect()
+                slots.append(slot)
+        finally:
+            self.invalidate()
+        return slots
+
+    def _reaches(self, source, target, required_only=False):
+        """Return True if the target module can be reached from the source
+        module, following only required slots if `required_only` is set."""
+        seen = set([source])
+        stack = [source]
+        while stack:
+            mid = stack.pop()
+            if mid == target:
+                return True
+            if required_only:
+                nexts = [s.input_module.name
+                         for slots in self._modules[mid].output_slot_values()
+                         if slots for s in slots
+                         if s.input_module.input_slot_required(s.input_name)]
+            else:
+                nexts = self._succ[mid]
+            for nxt in nexts:
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return False
+
+    def _check_cycle(self, slot):
+        """Raise a ProgressiveError if the slot would close a cycle of required
+        slots. Cycles going through an optional slot are accepted and broken
+        when ordering the modules."""
+        output_name = slot.output_module.name
+        input_name = slot.input_module.name
+        if not self._reaches(input_name, output_name):
+            return
+        if (slot.input_module.input_slot_required(slot.input_name) and
+                self._reaches(input_name, output_name, required_only=True)):
+            raise ProgressiveError('Slot %s creates a cycle of'
+                                   ' required slots' % slot)
+        self._cyclic = True
+
+    def _add_connection(self, slot):
+        "Record the dependency created by a connected slot"
+        output_name = slot.output_module.name
+        input_name = slot.input_module.name
+        assert output_name in self._modules and input_name in self._modules
+        self._pred[input_name].add(output_name)
+        self._succ[output_name].add(input_name)
+        if self._dyntopo_valid:
+            # a cycle falls back to a full sort in order_modules
+            self._dyntopo_valid = self._dyntopo.add_edge(
+                output_name, input_name, self._succ, self._pred)
+        self._invalidate_order()
 
     @property
     def module(self):
@@ -584,7 +809,7 @@ class BaseScheduler(object):
     @synchronized
     def remove_module(self, module):
         "Remove the specified module"
-        if isinstance(module, six.string_types):
+        if isinstance(module, str):
             module = self.module[module]
         module.terminate()
 #            self.stop()
@@ -592,7 +817,21 @@ class BaseScheduler(object):
         self._remove_module(module)
 
     def _remove_module(self, module):
-        del self._modules[module.name]
+        name = module.name
+        del self._modules[name]
+        self._dyntopo.remove_vertex(name)
+        for mid in self._pred.pop(name):
+            self._succ[mid].discard(name)
+        for mid in self._succ.pop(name):
+            self._pred[mid].discard(name)
+        self._free_module_bit(name)
+        self._cyclic = False  # recomputed by order_modules if still true
+        # Downstream modules keep their slot and see a terminated input
+        # pylint: disable=protected-access
+        for slot in module.input_slot_values():
+            if slot is not None:
+                slot.output_module._disconnect_output(slot)
+        self._invalidate_order()
 
     def modules(self):
         "Return the dictionary of modules."
@@ -611,21 +850,19 @@ class BaseScheduler(object):
         Notify this scheduler that the module has received input
         that should be served fast.
         """
-        with self._hibernate_cond:
-            self._keep_running = KEEP_RUNNING            
-            self._hibernate_cond.notify()
+        self._wake_up()
         sel = self._reachability[module.name]
         if sel:
             if not self._module_selection:
                 logger.info('Starting input management')
-                self._module_selection = set(sel)
+                self._module_selection = sel
                 self._selection_target_time = (self.timer() +
                                                self.interaction_latency)
             else:
-                self._module_selection.update(sel)
-            logger.debug('Input selection for module: %s',
-                         self._module_selection)
-            print('Input selection for module: %s'%self._module_selection)
+                self._module_selection |= sel
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug('Input selection for module: %s',
+                             self._mask_names(self._module_selection))
         return self.run_number()+1
 
     def has_input(self):
@@ -639,27 +876,32 @@ class BaseScheduler(object):
             return False
         return True
 
-    def _consider_module(self, module):
-        if not self.has_input():
+    def _consider_module(self, module, in_input):
+        if not in_input:
             return True
-        if module.name in self._module_selection:
-            #self._module_selection.remove(module.name)
+        if self._module_selection & self._bits.get(module.name, 0):
             logger.debug('Module %s ready for scheduling', module.name)
             return True
         logger.debug('Module %s NOT ready for scheduling', module.name)
         return False
 
-    def time_left(self):
-        "Return the time left to run for this slot."
+    def time_left(self, now=None):
+        """Return the time left to run for this slot.
+        `now` is the current value of the timer if the caller has it."""
         if self._selection_target_time <= 0 and not self.has_input():
             logger.error('time_left called with no target time')
             return 0
-        return max(0, self._selection_target_time - self.timer())
-
-    def fix_quantum(self, module, quantum):
-        "Fix the quantum of the specified module"
-        if self.has_input() and module.name in self._module_selection:
-            quantum = self.time_left() / len(self._module_selection)
+        if now is None:
+            now = self.timer()
+        return max(0, self._selection_target_time - now)
+
+    def fix_quantum(self, module, quantum, now=None):
+        """Fix the quantum of the specified module.
+        `now` is the current value of the timer if the caller has it."""
+        if (self.has_input() and
+                self._module_selection & self._bits.get(module.name, 0)):
+            quantum = (self.time_left(now) /
+                       bin(self._module_selection).count('1'))
         if quantum == 0:
             quantum = 0.1
             logger.info('Quantum is 0 in %s, setting it to'
@@ -24,6 +24,9 @@ class SlotDescriptor(namedtuple('SD',
 @six.python_2_unicode_compatible
 class Slot(object):
     "A Slot manages one connection between two modules."
+    __slots__ = ('output_name', 'output_module', 'input_name', 'input_module',
+                 '_name', 'changes', '_manage_columns', '_last_columns', 'meta')
+
     def __init__(self, output_module, output_name, input_module, input_name):
         self.output_name = output_name
         self.output_module = output_module
@@ -33,6 +36,7 @@ class Slot(object):
         self.changes = None
         self._manage_columns = None
         self._last_columns = None
+        self.meta = None
 
     def name(self):
         "Return the unique name of that slot"
@@ -79,23 +83,33 @@ class Slot(object):
     def connect(self):
         "Run when the progressive pipeline is about to run through this slot"
         scheduler = self.scheduler()
-        if scheduler != self.input_module.scheduler():
-            raise ProgressiveError('Cannot connect modules managed by'
-                                   ' different schedulers')
-
-        # TODO we should ensure that all connections required to move the
-        # pipeline from a valid state to another are executed atomically
+        # Use scheduler.add_connections to connect several slots atomically
         with scheduler.lock:
-            # pylint: disable=protected-access
             scheduler.slots_updated()
-
-            self.output_module._connect_output(self)
-            prev_slot = self.input_module._connect_input(self)
-            if prev_slot:
-                raise ProgressiveError('Input already connected for %s',
-                                       six.u(self))
+            self._connect()
             scheduler.invalidate()
 
+    def _connect(self):
+        # Called with the scheduler lock held
+        scheduler = self.scheduler()
+        if scheduler != self.input_module.scheduler():
+            raise ProgressiveError('Cannot connect modules managed by'
+                                   ' different schedulers')
+        # pylint: disable=protected-access
+        prev_slot = self.input_module._connect_input(self)
+        if prev_slot:
+            # restore the input before the output list is touched
+            self.input_module._connect_input(prev_slot)
+            raise ProgressiveError('Input already connected for %s',
+                                   six.u(self))
+        try:
+            scheduler._check_cycle(self)
+        except ProgressiveError:
+            self.input_module._disconnect_input(self)
+            raise
+        self.output_module._connect_output(self)
+        scheduler._add_connection(self)
+
     def validate_types(self):
         "Validate the types of the endpoints connected through this slot"
         output_type = self.output_module.output_slot_type(self.output_name)
@@ -166,6 +180,18 @@ class Slot(object):
         """
         return self.changes.has_buffered() if self.changes else False
 
+    def drain(self):
+        """
+        Clear all the buffers and return True if created or updated
+        information was buffered
+        """
+        changes = self.changes
+        if not changes:
+            return False
+        changed = changes.created.any() or changes.updated.any()
+        changes.clear()
+        return changed
+
     @property
     def created(self):
         "Return the buffer for created rows"
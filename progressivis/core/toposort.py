@@ -3,15 +3,102 @@ Topological sorting of a DAG
 """
 from __future__ import absolute_import, division, print_function
 
-def _sort(graph, vertex, permanent, temporary, stack):
-    if vertex in temporary:
+from collections import deque
+
+
+def iter_toposort(graph):
+    """
+    Iterate over the vertices in topological order, yielding each vertex
+    as soon as all its dependencies have been yielded.
+
+    The graph maps each vertex to the vertices it depends on.
+    Uses Kahn's algorithm, linear in the number of vertices and edges.
+    Raises ValueError after the last reachable vertex if the graph
+    contains a cycle.
+
+    >>> it = iter_toposort({'a': ['b'], 'b': ['a'], 'c': []})
+    >>> next(it)
+    'c'
+    >>> next(it)
+    Traceback (most recent call last):
+      ...
+    ValueError: Cycle in graph
+    """
+    if all(len(deps) <= 1 for deps in graph.values()):
+        # Common pipeline shape, no need to count indegrees
+        for vertex in _iter_forest(graph):
+            yield vertex
+        return
+    indegree = {}
+    successors = {}
+    for (vertex, deps) in graph.items():
+        deps = dict.fromkeys(deps)  # remove duplicates, keep the order
+        indegree[vertex] = len(deps)
+        for dep in deps:
+            indegree.setdefault(dep, 0)
+            successors.setdefault(dep, []).append(vertex)
+    queue = deque([v for (v, d) in indegree.items() if d == 0])
+    count = 0
+    while queue:
+        vertex = queue.popleft()
+        count += 1
+        yield vertex
+        for succ in successors.get(vertex, ()):
+            indegree[succ] -= 1
+            if indegree[succ] == 0:
+                queue.append(succ)
+    if count != len(indegree):
         raise ValueError('Cycle in graph')
-    temporary.add(vertex)
-    for i in graph.get(vertex, []):
-        if i not in permanent:
-            _sort(graph, i, permanent, temporary, stack)
-    permanent.add(vertex)
-    stack.append(vertex)
+
+
+def _iter_forest(graph):
+    """
+    Iterate over a graph where each vertex has at most one dependency,
+    walking down from the roots.
+
+    >>> list(_iter_forest({'a': ['b'], 'b': ['c'], 'd': ['b'], 'e': []}))
+    ['c', 'e', 'b', 'a', 'd']
+    """
+    children = {}
+    roots = []
+    extra = set()  # dependencies that are not keys of the graph
+    for (vertex, deps) in graph.items():
+        if not deps:
+            roots.append(vertex)
+        for dep in deps:
+            children.setdefault(dep, []).append(vertex)
+            if dep not in graph and dep not in extra:
+                extra.add(dep)
+                roots.append(dep)
+    queue = deque(roots)
+    count = 0
+    while queue:
+        vertex = queue.popleft()
+        count += 1
+        yield vertex
+        queue.extend(children.get(vertex, ()))
+    if count != len(graph) + len(extra):
+        raise ValueError('Cycle in graph')
+
+
+def toposort_kahn(graph):
+    """
+    Sort the vertices in topological order in a single pass.
+    Returns the sorted list and the list of the vertices left out because
+    they belong to a cycle or depend on one, empty if the graph is a DAG.
+
+    >>> toposort_kahn({'a': ['b'], 'b': ['a'], 'c': ['d'], 'e': ['a']})
+    (['d', 'c'], ['a', 'b', 'e'])
+    """
+    order = []
+    try:
+        order.extend(iter_toposort(graph))
+    except ValueError:
+        done = set(order)
+        remaining = [v for v in graph if v not in done]
+        return (order, remaining)
+    return (order, [])
+
 
 def toposort(graph):
     """
@@ -27,20 +114,103 @@ def toposort(graph):
     ['c', 'd', 'b', 'a']
 
     >>> toposort({'a': ['b'], 'c': ['d']})
-    ['b', 'a', 'd', 'c']
+    ['b', 'd', 'a', 'c']
 
     >>> toposort({'a': ['b'], 'b': ['a']})
     Traceback (most recent call last):
       ...
     ValueError: Cycle in graph
     """
-    permanent = set()
-    temporary = set()
-    stack = []
-    for i in graph:
-        if i not in permanent:
-            _sort(graph, i, permanent, temporary, stack)
-    return stack
+    return list(iter_toposort(graph))
+
+class DynamicToposort(object):
+    """
+    Topological order maintained under vertex and edge insertions, using
+    the algorithm of Pearce and Kelly: an edge that contradicts the order
+    only reorders the vertices between its two ends.
+
+    The graph itself is not stored, the successors and predecessors
+    mappings are passed to `add_edge`.
+
+    >>> succ = {'a': set(), 'b': set(), 'c': set()}
+    >>> pred = {'a': set(), 'b': set(), 'c': set()}
+    >>> topo = DynamicToposort()
+    >>> for v in 'abc':
+    ...     topo.add_vertex(v)
+    >>> succ['c'].add('a'); pred['a'].add('c')
+    >>> topo.add_edge('c', 'a', succ, pred)
+    True
+    >>> topo.sort('abc')
+    ['c', 'b', 'a']
+    >>> succ['a'].add('c'); pred['c'].add('a')
+    >>> topo.add_edge('a', 'c', succ, pred)
+    False
+    """
+    def __init__(self):
+        self.index = {}
+        self._next = 0
+
+    def add_vertex(self, vertex):
+        "Add a vertex after all the others"
+        self.index[vertex] = self._next
+        self._next += 1
+
+    def remove_vertex(self, vertex):
+        "Remove a vertex, the order remains valid"
+        self.index.pop(vertex, None)
+
+    def reset(self, order):
+        "Restart from a valid topological order"
+        self.index = {vertex: i for (i, vertex) in enumerate(order)}
+        self._next = len(order)
+
+    def add_edge(self, source, target, succ, pred):
+        """
+        Update the order after adding an edge from source to target.
+        Returns False, leaving the order unchanged, if the edge closes
+        a cycle.
+        """
+        index = self.index
+        lower = index[target]
+        upper = index[source]
+        if lower > upper:
+            return True
+        # vertices after target and before source, reached from target
+        forward = []
+        seen = set([target])
+        stack = [target]
+        while stack:
+            vertex = stack.pop()
+            forward.append(vertex)
+            for nxt in succ[vertex]:
+                if nxt == source:
+                    return False
+                if nxt not in seen and index[nxt] < upper:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        # vertices after target and before source, reaching source
+        backward = []
+        seen = set([source])
+        stack = [source]
+        while stack:
+            vertex = stack.pop()
+            backward.append(vertex)
+            for prv in pred[vertex]:
+                if prv not in seen and index[prv] > lower:
+                    seen.add(prv)
+                    stack.append(prv)
+        forward.sort(key=index.__getitem__)
+        backward.sort(key=index.__getitem__)
+        moved = backward + forward
+        positions = sorted(index[vertex] for vertex in moved)
+        for (vertex, pos) in zip(moved, positions):
+            index[vertex] = pos
+        return True
+
+    def sort(self, vertices):
+        "Return the vertices sorted in topological order"
+        return sorted(vertices, key=self.index.__getitem__)
+
 
 if __name__ == "__main__":
     import doctest
@@ -70,13 +70,25 @@ class FakeCondition(object):
         pass
     def __exit__(self, type, value, traceback):
         pass
+
+class FakeEvent(object):
+    def set(self):
+        pass
+    def clear(self):
+        pass
+    def is_set(self):
+        return False
+    def wait(self, timeout=None):
+        _ = timeout
+        return True
     
 if multi_threading:
-    from threading import Thread, Lock, RLock, Condition
+    from threading import Thread, Lock, RLock, Condition, Event
 else:
     Lock = FakeLock
     RLock = FakeLock
     Condition = FakeCondition
+    Event = FakeEvent
     
     class Thread(object):  # fake threads for debug
         def __init__(self, group=None, target=None, name=None,
@@ -416,6 +428,8 @@ def slice_to_arange(sl):
         return np.arange(*sl.indices(sl.stop))
     if isinstance(sl, np.ndarray):
         return sl
+    if isinstance(sl, bitmap):  # copy the buffer, do not iterate
+        return np.frombuffer(sl.to_array(), dtype=np.uint32).astype(np.int64)
     return np.array(sl)
 
 
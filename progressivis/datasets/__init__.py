@@ -1,16 +1,27 @@
 import os
 import os.path
-import six
 from progressivis import ProgressiveError
-from .random import generate_random_csv, generate_random_multivariate_normal_csv
+from .random import (generate_random_csv, generate_random_npy,
+                     generate_random_multivariate_normal_csv)
 from .wget import wget_file
 import bz2
 import zlib
+import gzip
+import lzma
+import threading
+from queue import Queue, Empty
+from contextlib import closing
 
 from functools import partial
 
+try:
+    from isal import igzip  # ISA-L accelerated gzip, optional
+except ImportError:
+    igzip = None
+
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../data'))
 Z_CHUNK_SIZE = 16*1024*32
+Z_QUEUE_SIZE = 4
 
 def get_dataset(name, **kwds):
     if not os.path.isdir(DATA_DIR):
@@ -31,35 +42,90 @@ def get_dataset(name, **kwds):
                          url='http://cs.joensuu.fi/sipu/datasets/%s'%fname)
     raise ProgressiveError('Unknown dataset %s'%name)
 
-if six.PY3:
-    import lzma
-    compressors = dict(bz2=dict(ext='.bz2', factory=bz2.BZ2Compressor),
-                        zlib=dict(ext='.zlib', factory=zlib.compressobj),
-                        gzip=dict(ext='.gz', factory=partial(zlib.compressobj, wbits=zlib.MAX_WBITS|16)),
-                        lzma=dict(ext='.xz', factory=lzma.LZMACompressor)
-                        )
-else:
-    compressors = dict(bz2=dict(ext='.bz2', factory=bz2.BZ2Compressor),
-                        zlib=dict(ext='.zlib', factory=zlib.compressobj),
-                        gzip=dict(ext='.gz', factory=partial(zlib.compressobj,
-                                                        zlib.Z_DEFAULT_COMPRESSION,
-                                                        zlib.DEFLATED, zlib.MAX_WBITS|16)))
+def get_dataset_npy(name):
+    """
+    Return the file name of the random dataset in the numpy .npy format,
+    in float32, to be loaded with np.load(filename, mmap_mode='r')
+    without parsing a csv file.
+    """
+    if not os.path.isdir(DATA_DIR):
+        os.mkdir(DATA_DIR)
+    if name == 'bigfile':
+        return generate_random_npy('%s/bigfile.npy'%DATA_DIR, 1000000, 30)
+    if name == 'smallfile':
+        return generate_random_npy('%s/smallfile.npy'%DATA_DIR, 30000, 10)
+    raise ProgressiveError('Unknown npy dataset %s'%name)
 
+# 'open' creates a compressed file writer, used when available
+compressors = dict(bz2=dict(ext='.bz2', factory=bz2.BZ2Compressor,
+                            open=bz2.open),
+                   zlib=dict(ext='.zlib', factory=zlib.compressobj),
+                   gzip=dict(ext='.gz', factory=partial(zlib.compressobj, wbits=zlib.MAX_WBITS|16),
+                             open=(igzip.open if igzip is not None
+                                   else partial(gzip.open, compresslevel=6))),
+                   lzma=dict(ext='.xz', factory=lzma.LZMACompressor,
+                             open=lzma.open)
+                   )
+
+def _iter_chunks(filename):
+    """
+    Iterate over the chunks of a file read by a thread, so reading
+    overlaps with the compression done by the caller.
+    """
+    chunks = Queue(maxsize=Z_QUEUE_SIZE)
+    stop = threading.Event()
+    error = []
+
+    def read():
+        try:
+            with open(filename, 'rb') as rdesc:
+                while not stop.is_set():
+                    data = rdesc.read(Z_CHUNK_SIZE)
+                    if not data:
+                        break
+                    chunks.put(data)
+        except Exception as exc:  # pylint: disable=broad-except
+            error.append(exc)
+        finally:
+            chunks.put(None)
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    try:
+        while True:
+            data = chunks.get()
+            if data is None:
+                break
+            yield data
+    finally:
+        # if the caller gave up, unblock the reader so it closes the file
+        stop.set()
+        while reader.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except Empty:
+                pass
+        reader.join()
+    if error:
+        raise error[0]
 
 def get_dataset_compressed(name, compressor, **kwds):
     source_file = get_dataset(name, **kwds)
     dest_file = source_file+compressor['ext']
     if os.path.isfile(dest_file):
         return dest_file
+    if 'open' in compressor:
+        with compressor['open'](dest_file, 'wb') as wdesc, \
+                closing(_iter_chunks(source_file)) as chunks:
+            for data in chunks:
+                wdesc.write(data)
+        return dest_file
     compressor = compressor['factory']()
-    with open(source_file, 'rb') as rdesc:
-        with open(dest_file, 'wb') as wdesc:
-            while True:
-                data = rdesc.read(Z_CHUNK_SIZE)
-                if not data:
-                    break
-                wdesc.write(compressor.compress(data))
-            wdesc.write(compressor.flush())
+    with open(dest_file, 'wb') as wdesc, \
+            closing(_iter_chunks(source_file)) as chunks:
+        for data in chunks:
+            wdesc.write(compressor.compress(data))
+        wdesc.write(compressor.flush())
     return dest_file
 
 def get_dataset_bz2(name, **kwds):
@@ -71,12 +137,9 @@ def get_dataset_zlib(name, **kwds):
 def get_dataset_gz(name, **kwds):
     return get_dataset_compressed(name, compressors['gzip'], **kwds)
 
-if six.PY3:
-    def get_dataset_lzma(name, **kwds):
-        return get_dataset_compressed(name, compressors['lzma'], **kwds)
-else:
-    def get_dataset_lzma(name, **kwds):
-        raise ValueError("lzma compression is not supported in Python 2.x")
+def get_dataset_lzma(name, **kwds):
+    return get_dataset_compressed(name, compressors['lzma'], **kwds)
 
 __all__ = ['get_dataset', 'get_dataset_bz2','get_dataset_zlib','get_dataset_gz',
-               'get_dataset_lzma', 'generate_random_csv']
+               'get_dataset_lzma', 'get_dataset_npy', 'generate_random_csv',
+               'generate_random_npy']
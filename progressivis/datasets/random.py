@@ -23,6 +23,30 @@ def generate_random_csv(filename, rows, cols, seed=1234):
     return filename
 
 
+def generate_random_npy(filename, rows, cols, seed=1234, dtype=np.float32,
+                        chunk_rows=100000):
+    """
+    Same distribution as generate_random_csv, saved in the numpy .npy format
+    to be memory-mapped with np.load(filename, mmap_mode='r').
+    """
+    if os.path.exists(filename):
+        return filename
+    rand = np.random.RandomState(seed=seed)
+    try:
+        # written by chunks through a memory map to bound memory usage
+        arr = np.lib.format.open_memmap(filename, mode='w+',
+                                        dtype=dtype, shape=(rows, cols))
+        for start in range(0, rows, chunk_rows):
+            stop = min(start+chunk_rows, rows)
+            arr[start:stop] = rand.normal(loc=0.5, scale=0.8,
+                                          size=(stop-start, cols))
+        arr.flush()
+        del arr
+    except (KeyboardInterrupt, SystemExit):
+        os.remove(filename)
+        raise
+    return filename
+
 
 def generate_random_multivariate_normal_csv(filename, rows, seed=1234):
     """
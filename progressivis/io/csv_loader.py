@@ -97,7 +97,7 @@ class CSVLoader(TableModule):
         self._input_compression = None
         self._input_size = 0
 
-    def get_progress(self):
+    def get_progress(self, run_number=None):
         if self._input_size==0:
             return (0, 0)
         pos = self._input_stream.tell()
@@ -34,19 +34,24 @@ class Counter(TableModule):
             if self._table is not None:
                 self._table.resize(0)
             dfslot.update(run_number)
-        indices = dfslot.created.next(step_size) # returns a slice
-        steps = indices_len(indices)
+            # all the rows come again as created, count them at once
+            steps = dfslot.created.length()
+            dfslot.created.clear()
+        else:
+            indices = dfslot.created.next(step_size) # returns a slice
+            steps = indices_len(indices)
         if steps==0:
             return self._return_run_step(self.state_blocked, steps_run=0)
-        input_df = dfslot.data()
-        data = pd.DataFrame(dict(counter=steps), index=[0])
         if self._table is None:
+            data = pd.DataFrame(dict(counter=steps), index=[0])
             self._table = Table(self.generate_table_name('counter'),
                                 data=data,
 #                                scheduler=self.scheduler(),
                                 create=True)
         elif len(self._table)==0: # has been resetted
-            self._table.append(data)
+            self._table.append(pd.DataFrame(dict(counter=steps), index=[0]))
         else:
-            self._table['counter'].loc[0] += steps
+            # the table has only one row, the scalar update avoids .loc
+            column = self._table['counter']
+            column[0] += steps
         return self._return_run_step(self.next_state(dfslot), steps_run=steps)
@@ -1,36 +1,25 @@
-import numpy as np
 import six
-from progressivis.core.utils import (slice_to_arange, indices_len, fix_loc)
+from progressivis.core.utils import (slice_to_arange, indices_len)
 
 from . import Table
 from . import TableSelectedView
 from ..core.slot import SlotDescriptor
 from .module import TableModule
 from ..core.bitmap import bitmap
-from .mod_impl import ModuleImpl
+from .mod_impl import ModuleImpl, _Selection
 from .binop import ops
+from .cmp_kernels import select_ids
 
 def _get_physical_table(t):
     return t if t.base is None else _get_physical_table(t.base)
 
-class _Selection(object):
-    def __init__(self, values=None):
-        self._values = bitmap([]) if values is None else values
-
-    def update(self, values):
-        self._values.update(values)
-
-    def remove(self, values):
-        self._values = self._values -bitmap(values)
-
-    def assign(self, values):
-        self._values = values
-
 class BisectImpl(ModuleImpl):
     def __init__(self, column, op, hist_index):
         super(BisectImpl, self).__init__()
         self._table = None
+        self._physical_table = None
         self._column = column
+        self._column_data = None
         self._op = op
         if isinstance(op, six.string_types):
             self._op = ops[op]
@@ -42,13 +31,17 @@ class BisectImpl(ModuleImpl):
         self.e_max = None
         self.boundaries = None
         self._hist_index = hist_index
-        self.result = None
+        self.result = _Selection()
 
     def _eval_to_ids(self, limit, input_ids):
-        x = self._table.loc[fix_loc(input_ids)][self._column].values
-        mask_ = self._op(x, limit)
+        # compare the raw column values, no view of the table is created
+        # the storage can be reallocated when the table grows, so the
+        # column is kept rather than its array
+        table = self._physical_table
         arr = slice_to_arange(input_ids)
-        return bitmap(arr[np.nonzero(mask_)[0]]) # maybe fancy indexing ...
+        indices = table.id_to_index(arr, as_slice=False)
+        return bitmap(select_ids(self._op, self._column_data.values,
+                                 indices, arr, limit))
                           
     def resume(self, limit, limit_changed, created=None, updated=None, deleted=None):
         if limit_changed:
@@ -59,18 +52,19 @@ class BisectImpl(ModuleImpl):
         if updated:
             self.result.remove(updated)
             #res = self._eval_to_ids(limit, updated)
-            res = self._hist_index.restricted_query(self._op, limit, updated)
-            self.result.add(res) # add not defined???
+            self._hist_index.restricted_query(self._op, limit, updated,
+                                              out=self.result._values)
         if created:
             #res = self._eval_to_ids(limit, created)
-            res = self._hist_index.restricted_query(self._op, limit, created)            
-            self.result.update(res)
+            self._hist_index.restricted_query(self._op, limit, created,
+                                              out=self.result._values)
         if deleted:
             self.result.remove(deleted)
 
     def start(self, table, limit, limit_changed, created=None, updated=None, deleted=None):
         self._table = table
-        self.result = _Selection()
+        self._physical_table = _get_physical_table(table)
+        self._column_data = self._physical_table._column(self._column)
         self.is_started = True
         return self.resume(limit, limit_changed, created, updated, deleted)
 
@@ -93,6 +87,7 @@ class Bisect(TableModule):
         super(Bisect, self).__init__(scheduler=scheduler, **kwds)
         self._impl = BisectImpl(self.params.column,
                                 self.params.op, hist_index) 
+        self._limit_key = self.params.limit_key
         self.default_step_size = 1000
     def run_step(self, run_number, step_size, howlong):
         input_slot = self.get_input_slot('table')
@@ -113,38 +108,30 @@ class Bisect(TableModule):
         with input_slot.lock:
             input_table = input_slot.data()
         if not self._table:
-            self._table = TableSelectedView(input_table, bitmap([]))
+            # the view shares the selection bitmap updated by the impl
+            self._table = TableSelectedView(input_table,
+                                            self._impl.result._values)
         if steps==0:
             return self._return_run_step(self.state_blocked, steps_run=0)
-        param = self.params
         limit_slot = self.get_input_slot('limit')
         limit_slot.update(run_number)
-        limit_changed = False
-        if limit_slot.deleted.any():
-            limit_slot.deleted.next()
-        if limit_slot.updated.any():
-            limit_slot.updated.next()
-            limit_changed = True
-        if limit_slot.created.any():
-            limit_slot.created.next()
-            limit_changed = True
-        if len(limit_slot.data()) == 0:
+        limit_changed = limit_slot.drain()
+        limit_data = limit_slot.data()
+        if len(limit_data) == 0:
             return self._return_run_step(self.state_blocked, steps_run=0)
-        if param.limit_key:
-            limit_value = limit_slot.data().last(param.limit_key)
+        if self._limit_key:
+            limit_value = limit_data.last(self._limit_key)
         else:
-            limit_value = limit_slot.data().last()[0]
+            limit_value = limit_data.last()[0]
         if not self._impl.is_started:
             #self._table = TableSelectedView(input_table, bitmap([]))
             status = self._impl.start(input_table, limit_value, limit_changed,
                                       created=created,
                                       updated=updated,
                                       deleted=deleted)
-            self._table.selection = self._impl.result._values
         else:
             status = self._impl.resume(limit_value, limit_changed,
                                        created=created,
                                        updated=updated,
                                        deleted=deleted)
-            self._table.selection = self._impl.result._values
         return self._return_run_step(self.next_state(input_slot), steps_run=steps)
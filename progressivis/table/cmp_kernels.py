@@ -0,0 +1,111 @@
+"""
+Comparison kernels returning the ids of the rows whose value matches a limit.
+
+When numba is installed, the comparison and the selection of the ids are
+fused in one compiled loop, without the intermediate boolean mask.
+Otherwise, large comparisons are evaluated by numexpr and small ones by numpy.
+"""
+from __future__ import absolute_import, division, print_function
+
+import operator
+
+import numpy as np
+import numexpr as ne
+
+try:
+    import numba  # optional
+except ImportError:
+    numba = None
+
+_NUMERIC_KINDS = 'biuf'
+NE_THRESHOLD = 50000  # below, the numexpr overhead is not amortized
+_NE_EXPRS = {operator.gt: 'x > limit', operator.ge: 'x >= limit',
+             operator.lt: 'x < limit', operator.le: 'x <= limit',
+             operator.eq: 'x == limit', operator.ne: 'x != limit'}
+
+
+def _select_ids_numpy(op, values, indices, ids, limit):
+    x = values[indices]
+    expr = _NE_EXPRS.get(op)
+    if (expr is not None and len(x) > NE_THRESHOLD
+            and x.dtype.kind in _NUMERIC_KINDS):
+        mask = ne.evaluate(expr, local_dict={'x': x, 'limit': limit})
+    else:
+        mask = op(x, limit)
+    return ids[mask]
+
+
+if numba is not None:
+    # pylint: disable=invalid-name
+    @numba.njit(cache=True)
+    def _gt_idx(values, indices, ids, limit, out):
+        k = 0
+        for i in range(len(indices)):
+            if values[indices[i]] > limit:
+                out[k] = ids[i]
+                k += 1
+        return k
+
+    @numba.njit(cache=True)
+    def _ge_idx(values, indices, ids, limit, out):
+        k = 0
+        for i in range(len(indices)):
+            if values[indices[i]] >= limit:
+                out[k] = ids[i]
+                k += 1
+        return k
+
+    @numba.njit(cache=True)
+    def _lt_idx(values, indices, ids, limit, out):
+        k = 0
+        for i in range(len(indices)):
+            if values[indices[i]] < limit:
+                out[k] = ids[i]
+                k += 1
+        return k
+
+    @numba.njit(cache=True)
+    def _le_idx(values, indices, ids, limit, out):
+        k = 0
+        for i in range(len(indices)):
+            if values[indices[i]] <= limit:
+                out[k] = ids[i]
+                k += 1
+        return k
+
+    @numba.njit(cache=True)
+    def _eq_idx(values, indices, ids, limit, out):
+        k = 0
+        for i in range(len(indices)):
+            if values[indices[i]] == limit:
+                out[k] = ids[i]
+                k += 1
+        return k
+
+    @numba.njit(cache=True)
+    def _ne_idx(values, indices, ids, limit, out):
+        k = 0
+        for i in range(len(indices)):
+            if values[indices[i]] != limit:
+                out[k] = ids[i]
+                k += 1
+        return k
+
+    _KERNELS = {operator.gt: _gt_idx, operator.ge: _ge_idx,
+                operator.lt: _lt_idx, operator.le: _le_idx,
+                operator.eq: _eq_idx, operator.ne: _ne_idx}
+else:
+    _KERNELS = {}
+
+
+def select_ids(op, values, indices, ids, limit):
+    """
+    Return the array of `ids[i]` such that `op(values[indices[i]], limit)`.
+    """
+    kernel = _KERNELS.get(op)
+    if (kernel is None or values.dtype.kind not in _NUMERIC_KINDS
+            or not np.isscalar(limit)):
+        return _select_ids_numpy(op, values, indices, ids, limit)
+    out = np.empty(len(indices), dtype=ids.dtype)
+    count = kernel(values, np.asarray(indices), ids, limit, out)
+    return out[:count]
@@ -2,10 +2,9 @@ from __future__ import absolute_import, division, print_function
 
 import numexpr as ne
 
-from .mod_impl import ModuleImpl
+from .mod_impl import ModuleImpl, _Selection
 from progressivis.core.utils import indices_len, fix_loc
 import six
-from progressivis.core.bitmap  import bitmap
 
 import numpy as np
 
@@ -17,18 +16,6 @@ _fix = fix_loc
 import logging
 logger = logging.getLogger(__name__)
 
-class _Selection(object):
-    def __init__(self, values=None):
-        self._values = bitmap([]) if values is None else values
-
-    def add(self, values):
-        self._values.update(values)
-
-    def remove(self, values):
-        self._values = self._values -bitmap(values)
-
-
-    
 class FilterImpl(ModuleImpl):
     def __init__(self, expr, user_dict=None):
         super(FilterImpl, self).__init__()
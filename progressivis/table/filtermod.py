@@ -27,8 +27,7 @@ class FilterMod(TableModule):
         steps = 0
         if input_slot.updated.any():
             input_slot.reset()
-            if self._table is not None:
-                self._table.selection = bitmap([])
+            self._impl.result.assign(bitmap([]))
             input_slot.update(run_number)
         deleted = None            
         if input_slot.deleted.any():
@@ -46,17 +45,16 @@ class FilterMod(TableModule):
             input_table = input_slot.data()
         p = self.params
         if not self._impl.is_started:
-            self._table = TableSelectedView(input_table, bitmap([]))
+            self._table = TableSelectedView(input_table,
+                                            self._impl.result._values)
             status = self._impl.start(input_table,
                                                  created=created,
                                                  updated=updated,
                                                  deleted=deleted)
-            self._table.selection = self._impl.result._values
         else:
             status = self._impl.resume(
                                                 created=created,
                                                 updated=updated,
                                                 deleted=deleted)
-            self._table.selection = self._impl.result._values            
         return self._return_run_step(self.next_state(input_slot), steps_run=steps)
         
@@ -13,9 +13,11 @@ import numpy as np
 #from tdigest import TDigest
 from progressivis.core.bitmap import bitmap
 from progressivis.core.slot import SlotDescriptor
-from progressivis.core.utils import (slice_to_arange, fix_loc) #, indices_to_slice)
+from progressivis.core.utils import slice_to_arange #, indices_to_slice)
 #from progressivis.stats import Min, Max
 from .module import TableModule
+from .cmp_kernels import select_ids
+from .bisectmod import _get_physical_table
 from . import Table
 from . import TableSelectedView
 
@@ -202,13 +204,15 @@ class _HistogramIndexImpl(object):
                 detail.update(bm)
         return detail
 
-    def restricted_query(self, operator_, limit, only_locs, approximate=APPROX):  # blocking...
+    def restricted_query(self, operator_, limit, only_locs, approximate=APPROX,
+                         out=None):  # blocking...
         """
-        Returns the subset of only_locs matching the query.
+        Returns the subset of only_locs matching the query,
+        added to the `out` bitmap if specified.
         """
         only_locs = bitmap.asbitmap(only_locs)
         pos = np.digitize(limit, self.bins)
-        detail = bitmap()
+        detail = bitmap() if out is None else out
         if not approximate:
             ids = np.array(self.bitmaps[pos]&only_locs, np.int64)
             values = self.column.loc[ids]
@@ -236,6 +240,7 @@ class _HistogramIndexImpl(object):
             values = self.column.loc[ids]
             if pos[0] == pos[1]:
                 selected = ids[(lower <= values)&(values < upper)]
+                detail.update(selected)
             else:
                 selected = ids[lower <= values]
                 detail.update(selected)
@@ -261,6 +266,7 @@ class _HistogramIndexImpl(object):
             values = self.column.loc[ids]
             if pos[0] == pos[1]:
                 selected = ids[(lower <= values)&(values < upper)]
+                detail.update(selected)
             else:
                 selected = ids[lower <= values]
                 detail.update(selected)
@@ -271,20 +277,23 @@ class _HistogramIndexImpl(object):
             res.append(detail)
         return res
 
-    def restricted_range_query(self, lower, upper, only_locs, approximate=APPROX):
+    def restricted_range_query(self, lower, upper, only_locs, approximate=APPROX,
+                               out=None):
         """
-        Return the bitmap of only_locs rows in range [`lower`, `upper`[
+        Return the bitmap of only_locs rows in range [`lower`, `upper`[,
+        added to the `out` bitmap if specified.
         """
         if lower > upper:
             lower, upper = upper, lower
         only_locs = bitmap.asbitmap(only_locs)
         pos = np.digitize([lower, upper], self.bins)
-        detail = bitmap()
+        detail = bitmap() if out is None else out
         if not approximate:
             ids = np.array(self.bitmaps[pos[0]]&only_locs, np.int64)
             values = self.column.loc[ids]
             if pos[0] == pos[1]:
                 selected = ids[(lower <= values)&(values < upper)]
+                detail.update(selected)
             else:
                 selected = ids[lower <= values]
                 detail.update(selected)
@@ -435,12 +444,11 @@ class HistogramIndex(TableModule):
         table_ = input_slot.data()
         if input_ids is None:
             input_ids = table_.index
-        else:
-            input_ids = fix_loc(input_ids)
-        x = table_[self.column].loc[input_ids]
-        mask_ = operator_(x, limit)
+        table_ = _get_physical_table(table_)
         arr = slice_to_arange(input_ids)
-        return bitmap(arr[np.nonzero(mask_)[0]])
+        values = table_._column(self.column).values
+        indices = table_.id_to_index(arr, as_slice=False)
+        return bitmap(select_ids(operator_, values, indices, arr, limit))
 
     def query(self, operator_, limit, approximate=APPROX):
         """
@@ -453,17 +461,24 @@ class HistogramIndex(TableModule):
         # there are no histogram because init_threshold wasn't be reached yet
         # so we query the input table directly
         return self._eval_to_ids(operator_, limit)
-    def restricted_query(self, operator_, limit, only_locs, approximate=APPROX):
+    def restricted_query(self, operator_, limit, only_locs, approximate=APPROX,
+                         out=None):
         """
         Return the list of rows matching the query.
         For example, returning all values less than 10 (< 10) would be
         `query(operator.__lt__, 10)`
+        If `out` is specified, the rows are added to this bitmap.
         """
         if self._impl:
-            return self._impl.restricted_query(operator_, limit, only_locs, approximate)
+            return self._impl.restricted_query(operator_, limit, only_locs,
+                                               approximate, out)
         # there are no histogram because init_threshold wasn't be reached yet
         # so we query the input table directly
-        return self._eval_to_ids(operator_, limit, only_locs)
+        res = self._eval_to_ids(operator_, limit, only_locs)
+        if out is None:
+            return res
+        out |= res
+        return out
 
     def range_query_aslist(self, lower, upper, approximate=APPROX):
         """
@@ -482,17 +497,24 @@ class HistogramIndex(TableModule):
         # so we query the input table directly
         return (self._eval_to_ids(operator.__lt__, upper) &  # optimize later
                 self._eval_to_ids(operator.__ge__, lower))
-    def restricted_range_query(self, lower, upper, only_locs, approximate=APPROX):
+    def restricted_range_query(self, lower, upper, only_locs, approximate=APPROX,
+                               out=None):
         """
         Return the list of rows with values in range [`lower`, `upper`[ 
-        among only_locs
+        among only_locs.
+        If `out` is specified, the rows are added to this bitmap.
         """
         if self._impl:
-            return self._impl.restricted_range_query(lower, upper, only_locs, approximate)
+            return self._impl.restricted_range_query(lower, upper, only_locs,
+                                                     approximate, out)
         # there are no histogram because init_threshold wasn't be reached yet
         # so we query the input table directly
-        return (self._eval_to_ids(operator.__lt__, upper, only_locs) &  # optimize later
-                self._eval_to_ids(operator.__ge__, lower, only_locs))
+        res = (self._eval_to_ids(operator.__lt__, upper, only_locs) &  # optimize later
+               self._eval_to_ids(operator.__ge__, lower, only_locs))
+        if out is None:
+            return res
+        out |= res
+        return out
 
     def create_dependent_modules(self, input_module, input_slot, **kwds):
         #s = self.scheduler()
@@ -1,5 +1,33 @@
 from abc import ABCMeta, abstractmethod, abstractproperty
 import six
+from progressivis.core.bitmap import bitmap
+
+
+class _Selection(object):
+    """
+    Selection of ids computed by a module implementation, updated in place
+    so the views sharing the bitmap see all the changes
+    """
+    def __init__(self, values=None):
+        self._values = bitmap([]) if values is None else values
+
+    def update(self, values):
+        self._values.update(values)
+
+    add = update
+
+    def remove(self, values):
+        if isinstance(values, slice) and values.step in (None, 1):
+            self._values.remove_range(values.start or 0, values.stop)
+        else:
+            self._values -= bitmap.asbitmap(values)
+
+    def assign(self, values):
+        if values is self._values:
+            return
+        self._values.clear()
+        self._values.update(values)
+
 
 @six.python_2_unicode_compatible
 class ModuleImpl(six.with_metaclass(ABCMeta, object)):
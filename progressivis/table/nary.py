@@ -20,8 +20,7 @@ class NAry(TableModule):
 
     def _add_input_slot(self, name):
         self.inputs.append(name)
-        self.input_descriptors[name] = SlotDescriptor(name, type=BaseTable, required=True)
-        self._input_slots[name] = None
+        self._add_input_descriptor(SlotDescriptor(name, type=BaseTable, required=True))
 
     # Magic input slot created
     def _connect_input(self, slot):
@@ -31,7 +30,7 @@ class NAry(TableModule):
             self._add_input_slot(name)
             slot.input_name = name # patch the slot name
             ret = None
-        self._input_slots[slot.input_name] = slot
+        super(NAry, self)._connect_input(slot)
         return ret
 
     def run_step(self, run_number, step_size, howlong):  # pragma no cover
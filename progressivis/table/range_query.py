@@ -1,5 +1,3 @@
-import numpy as np
-
 from progressivis.core.utils import (slice_to_arange, indices_len, fix_loc,
                                          get_physical_base)
 
@@ -8,7 +6,7 @@ from . import TableSelectedView
 from ..core.slot import SlotDescriptor
 from .module import TableModule
 from ..core.bitmap import bitmap
-from .mod_impl import ModuleImpl
+from .mod_impl import ModuleImpl, _Selection
 from .binop import ops
 from ..io import Variable
 from ..stats import Min, Max
@@ -18,20 +16,11 @@ from progressivis.core.synchronized import synchronized
 def _get_physical_table(t):
     return t if t.base is None else _get_physical_table(t.base)
 
-class _Selection(object):
-    def __init__(self, values=None):
-        self._values = bitmap([]) if values is None else values
-
-    def update(self, values):
-        self._values.update(values)
-
-    def remove(self, values):
-        self._values = self._values -bitmap(values)
-
-    def assign(self, values):
-        self._values = values
-
 class RangeQueryImpl(ModuleImpl):
+    # when the bounds move by less than this ratio of the range width,
+    # only the bands between the old and the new bounds are queried
+    shift_ratio = 0.25
+
     def __init__(self, column, hist_index, approximate):
         super(RangeQueryImpl, self).__init__()
         self._table = None
@@ -39,34 +28,59 @@ class RangeQueryImpl(ModuleImpl):
         self.bins = None
         self._hist_index = hist_index
         self._approximate = approximate
-        self.result = None
+        self.result = _Selection()
         self.is_started = False
-        
+        self._lower = None
+        self._upper = None
+
+    def _can_shift(self, lower, upper):
+        if self._approximate or self._lower is None:
+            return False
+        if lower >= self._upper or upper <= self._lower:
+            return False  # the new range does not overlap the old one
+        moved = abs(lower - self._lower) + abs(upper - self._upper)
+        return moved < self.shift_ratio * (upper - lower)
+
+    def _shift(self, lower, upper):
+        "Move the selection from the old bounds to the new ones"
+        range_query = self._hist_index.range_query
+        if lower > self._lower:
+            self.result.remove(range_query(self._lower, lower))
+        elif lower < self._lower:
+            self.result.update(range_query(lower, self._lower))
+        if upper < self._upper:
+            self.result.remove(range_query(upper, self._upper))
+        elif upper > self._upper:
+            self.result.update(range_query(self._upper, upper))
+
     def resume(self, lower, upper, limit_changed, created=None,
                    updated=None, deleted=None):
         if limit_changed:
-            #return self.reconstruct_from_hist_cache(limit)
-            new_sel = self._hist_index.range_query(lower, upper,
+            if not self._can_shift(lower, upper):
+                #return self.reconstruct_from_hist_cache(limit)
+                new_sel = self._hist_index.range_query(lower, upper,
                                                 approximate=self._approximate)
-            self.result.assign(new_sel)
-            return
+                self.result.assign(new_sel)
+                self._lower, self._upper = lower, upper
+                return
+            self._shift(lower, upper)
+        self._lower, self._upper = lower, upper
         if updated:
             self.result.remove(updated)
             #res = self._eval_to_ids(limit, updated)
-            res = self._hist_index.restricted_range_query(lower, upper,
-                            only_locs=updated, approximate=self._approximate)
-            self.result.add(res) # add not defined???
+            self._hist_index.restricted_range_query(lower, upper,
+                            only_locs=updated, approximate=self._approximate,
+                            out=self.result._values)
         if created:
             #res = self._eval_to_ids(limit, created)
-            res = self._hist_index.restricted_range_query(lower, upper,
-                            only_locs=created, approximate=self._approximate)
-            self.result.update(res)
+            self._hist_index.restricted_range_query(lower, upper,
+                            only_locs=created, approximate=self._approximate,
+                            out=self.result._values)
         if deleted:
             self.result.remove(deleted)
 
     def start(self, table, lower, upper, limit_changed, created=None, updated=None, deleted=None):
         self._table = table
-        self.result = _Selection()
         self.is_started = True
         return self.resume(lower, upper, limit_changed, created, updated, deleted)
 
@@ -108,6 +122,8 @@ class RangeQuery(TableModule):
         self.input_module = None
         self._min_table = None
         self._max_table = None
+        self._last_min = None
+        self._last_max = None
     @property
     def hist_index(self):
         return self._hist_index
@@ -171,18 +187,22 @@ class RangeQuery(TableModule):
             self._min_table = Table(name=None, dshape='{%s: float64}'%self._column)
         if len(self._min_table)==0:
             self._min_table.append({self._column: val}, indices=[0])
+            self._last_min = val
             return
-        if self._min_table.last(self._column) == val: return 
-        self._min_table[self._column].loc[0] = val
+        if self._last_min == val: return
+        self._last_min = val
+        self._min_table[self._column][0] = val
         
     def _set_max_out(self, val):
         if self._max_table is None:
             self._max_table = Table(name=None, dshape='{%s: float64}'%self._column)
         if len(self._max_table)==0:
             self._max_table.append({self._column: val}, indices=[0])
+            self._last_max = val
             return
-        if self._max_table.last(self._column) == val: return 
-        self._max_table[self._column].loc[0] = val
+        if self._last_max == val: return
+        self._last_max = val
+        self._max_table[self._column][0] = val
 
     def get_data(self, name):
         if name == 'min':
@@ -211,61 +231,46 @@ class RangeQuery(TableModule):
         with input_slot.lock:
             input_table = input_slot.data()
         if not self._table:
-            self._table = TableSelectedView(input_table, bitmap([]))
+            self._table = TableSelectedView(input_table,
+                                            self._impl.result._values)
         self._create_min_max()
-        param = self.params
         #
         # lower/upper
         #
         lower_slot = self.get_input_slot('lower')
         lower_slot.update(run_number)
         upper_slot = self.get_input_slot('upper')
-        limit_changed = False
-        if lower_slot.deleted.any():
-            lower_slot.deleted.next()
-        if lower_slot.updated.any():
-            lower_slot.updated.next()
-            limit_changed = True
-        if lower_slot.created.any():
-            lower_slot.created.next()
-            limit_changed = True
+        limit_changed = lower_slot.drain()
         if not (lower_slot is upper_slot):
             upper_slot.update(run_number)
-            if upper_slot.deleted.any():
-                upper_slot.deleted.next()
-            if upper_slot.updated.any():
-                upper_slot.updated.next()
-                limit_changed = True
-            if upper_slot.created.any():
-                upper_slot.created.next()
-                limit_changed = True            
+            limit_changed |= upper_slot.drain()
         #
         # min/max
         #
         min_slot = self.get_input_slot('min')
         min_slot.update(run_number)
-        min_slot.created.next()
-        min_slot.updated.next()
-        min_slot.deleted.next()        
+        min_slot.drain()
         max_slot = self.get_input_slot('max')
         max_slot.update(run_number)
-        max_slot.created.next()
-        max_slot.updated.next()
-        max_slot.deleted.next()
-        if (lower_slot.data() is None or upper_slot.data() is None
-                or len(lower_slot.data()) == 0 or len(upper_slot.data()) == 0):
-            return self._return_run_step(self.state_blocked, steps_run=0)
-        lower_value = lower_slot.data().last(self._watched_key_lower)
-        upper_value = upper_slot.data().last(self._watched_key_upper)
-        if (lower_slot.data() is None or upper_slot.data() is None
-                or len(min_slot.data()) == 0 or len(max_slot.data()) == 0):
+        max_slot.drain()
+        lower_data = lower_slot.data()
+        upper_data = upper_slot.data()
+        min_data = min_slot.data()
+        max_data = max_slot.data()
+        if (lower_data is None or upper_data is None
+                or min_data is None or max_data is None
+                or len(lower_data) == 0 or len(upper_data) == 0
+                or len(min_data) == 0 or len(max_data) == 0):
             return self._return_run_step(self.state_blocked, steps_run=0)
-        minv = min_slot.data().last(self._watched_key_lower)
-        maxv = max_slot.data().last(self._watched_key_upper)
-        if lower_value is None or np.isnan(lower_value) or lower_value < minv or lower_value>=maxv:
+        lower_value = lower_data.last(self._watched_key_lower)
+        upper_value = upper_data.last(self._watched_key_upper)
+        minv = min_data.last(self._watched_key_lower)
+        maxv = max_data.last(self._watched_key_upper)
+        # a value differing from itself is a NaN
+        if lower_value is None or lower_value != lower_value or lower_value < minv or lower_value>=maxv:
             lower_value = minv
             limit_changed = True
-        if (upper_value is None or np.isnan(upper_value) or upper_value > maxv or upper_value<=minv
+        if (upper_value is None or upper_value != upper_value or upper_value > maxv or upper_value<=minv
                 or upper_value<=lower_value):
             upper_value = maxv
             limit_changed = True
@@ -279,11 +284,9 @@ class RangeQuery(TableModule):
                                       created=created,
                                       updated=updated,
                                       deleted=deleted)
-            self._table.selection = self._impl.result._values
         else:
             status = self._impl.resume(lower_value, upper_value, limit_changed,
                                        created=created,
                                        updated=updated,
                                        deleted=deleted)
-            self._table.selection = self._impl.result._values
         return self._return_run_step(self.next_state(input_slot), steps_run=steps)
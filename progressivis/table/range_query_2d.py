@@ -1,5 +1,3 @@
-import numpy as np
-
 from progressivis.core.utils import (slice_to_arange, indices_len, fix_loc)
                                          
 import itertools as it
@@ -8,7 +6,7 @@ from . import TableSelectedView
 from ..core.slot import SlotDescriptor
 from .module import TableModule
 from ..core.bitmap import bitmap
-from .mod_impl import ModuleImpl
+from .mod_impl import ModuleImpl, _Selection
 from .binop import ops
 from ..io import Variable
 from ..stats import Min, Max
@@ -16,19 +14,6 @@ from .hist_index import HistogramIndex
 from progressivis.core.synchronized import synchronized
 from progressivis.table.paste import Paste
 
-class _Selection(object):
-    def __init__(self, values=None):
-        self._values = bitmap([]) if values is None else values
-
-    def update(self, values):
-        self._values.update(values)
-
-    def remove(self, values):
-        self._values = self._values -bitmap(values)
-
-    def assign(self, values):
-        self._values = values
-
 class RangeQuery2dImpl(ModuleImpl):
     def __init__(self, column_x, column_y, hist_index_x, hist_index_y, approximate):
         super(RangeQuery2dImpl, self).__init__()
@@ -39,7 +24,7 @@ class RangeQuery2dImpl(ModuleImpl):
         self._hist_index_x = hist_index_x
         self._hist_index_y = hist_index_y        
         self._approximate = approximate
-        self.result = None
+        self.result = _Selection()
         self.is_started = False
         
     def resume(self, lower_x, upper_x, lower_y, upper_y, limit_changed, created=None,
@@ -65,7 +50,7 @@ class RangeQuery2dImpl(ModuleImpl):
                             only_locs=updated, approximate=self._approximate)
             res_y = self._hist_index_y.restricted_range_query(lower_y, upper_y,
                             only_locs=updated, approximate=self._approximate)
-            self.result.add(res_x&res_y) # add not defined???
+            self.result.add(res_x&res_y)
         if created:
             res_x = self._hist_index_x.restricted_range_query(lower_x, upper_x,
                             only_locs=created, approximate=self._approximate)
@@ -77,7 +62,6 @@ class RangeQuery2dImpl(ModuleImpl):
 
     def start(self, table, lower_x, upper_x, lower_y, upper_y, limit_changed, created=None, updated=None, deleted=None):
         self._table = table
-        self.result = _Selection()
         self.is_started = True
         return self.resume(lower_x, upper_x, lower_y, upper_y, limit_changed, created, updated, deleted)
 
@@ -132,6 +116,8 @@ class RangeQuery2d(TableModule):
         self.input_module = None
         self._min_table = None
         self._max_table = None
+        self._last_min = None
+        self._last_max = None
     #@property
     #def hist_index(self):
     #    return self._hist_index
@@ -217,12 +203,13 @@ class RangeQuery2d(TableModule):
         if len(self._min_table) == 0:
             self._min_table.append({self._column_x: val_x,
                                     self._column_y: val_y}, indices=[0])
+            self._last_min = (val_x, val_y)
             return
-        if (self._min_table.last(self._column_x) == val_x and
-            self._min_table.last(self._column_y) == val_y):
+        if self._last_min == (val_x, val_y):
             return
-        self._min_table[self._column_x].loc[0] = val_x
-        self._min_table[self._column_y].loc[0] = val_y
+        self._last_min = (val_x, val_y)
+        self._min_table[self._column_x][0] = val_x
+        self._min_table[self._column_y][0] = val_y
 
     def _set_max_out(self, val_x, val_y):
         if self._max_table is None:
@@ -230,12 +217,13 @@ class RangeQuery2d(TableModule):
         if len(self._max_table) == 0:
             self._max_table.append({self._column_x: val_x,
                                     self._column_y: val_y}, indices=[0])
+            self._last_max = (val_x, val_y)
             return
-        if (self._max_table.last(self._column_x) == val_x and
-            self._max_table.last(self._column_y) == val_y):
+        if self._last_max == (val_x, val_y):
             return
-        self._max_table[self._column_x].loc[0] = val_x
-        self._max_table[self._column_y].loc[0] = val_y
+        self._last_max = (val_x, val_y)
+        self._max_table[self._column_x][0] = val_x
+        self._max_table[self._column_y][0] = val_y
 
     def get_data(self, name):
         if name == 'min':
@@ -264,78 +252,63 @@ class RangeQuery2d(TableModule):
         with input_slot.lock:
             input_table = input_slot.data()
         if not self._table:
-            self._table = TableSelectedView(input_table, bitmap([]))
+            self._table = TableSelectedView(input_table,
+                                            self._impl.result._values)
         self._create_min_max()
-        param = self.params
         #
         # lower/upper
         #
         lower_slot = self.get_input_slot('lower')
         lower_slot.update(run_number)
         upper_slot = self.get_input_slot('upper')
-        limit_changed = False
-        if lower_slot.deleted.any():
-            lower_slot.deleted.next()
-        if lower_slot.updated.any():
-            lower_slot.updated.next()
-            limit_changed = True
-        if lower_slot.created.any():
-            lower_slot.created.next()
-            limit_changed = True
+        limit_changed = lower_slot.drain()
         if not (lower_slot is upper_slot):
             upper_slot.update(run_number)
-            if upper_slot.deleted.any():
-                upper_slot.deleted.next()
-            if upper_slot.updated.any():
-                upper_slot.updated.next()
-                limit_changed = True
-            if upper_slot.created.any():
-                upper_slot.created.next()
-                limit_changed = True            
+            limit_changed |= upper_slot.drain()
         #
         # min/max
         #
         min_slot = self.get_input_slot('min')
         min_slot.update(run_number)
-        min_slot.created.next()
-        min_slot.updated.next()
-        min_slot.deleted.next()        
+        min_slot.drain()
         max_slot = self.get_input_slot('max')
         max_slot.update(run_number)
-        max_slot.created.next()
-        max_slot.updated.next()
-        max_slot.deleted.next()
-        if (lower_slot.data() is None or upper_slot.data() is None
-                or len(lower_slot.data()) == 0 or len(upper_slot.data()) == 0):
+        max_slot.drain()
+        lower_data = lower_slot.data()
+        upper_data = upper_slot.data()
+        min_data = min_slot.data()
+        max_data = max_slot.data()
+        if (lower_data is None or upper_data is None
+                or min_data is None or max_data is None
+                or len(lower_data) == 0 or len(upper_data) == 0
+                or len(min_data) == 0 or len(max_data) == 0):
             return self._return_run_step(self.state_blocked, steps_run=0)
         # X ...
-        lower_value_x = lower_slot.data().last(self._watched_key_lower_x)
-        upper_value_x = upper_slot.data().last(self._watched_key_upper_x)
+        lower_value_x = lower_data.last(self._watched_key_lower_x)
+        upper_value_x = upper_data.last(self._watched_key_upper_x)
         # Y ...
-        lower_value_y = lower_slot.data().last(self._watched_key_lower_y)
-        upper_value_y = upper_slot.data().last(self._watched_key_upper_y)
-        if (lower_slot.data() is None or upper_slot.data() is None
-                or len(min_slot.data()) == 0 or len(max_slot.data()) == 0):
-            return self._return_run_step(self.state_blocked, steps_run=0)
+        lower_value_y = lower_data.last(self._watched_key_lower_y)
+        upper_value_y = upper_data.last(self._watched_key_upper_y)
         # X ...
-        minv_x = min_slot.data().last(self._watched_key_lower_x)
-        maxv_x = max_slot.data().last(self._watched_key_upper_x)
+        minv_x = min_data.last(self._watched_key_lower_x)
+        maxv_x = max_data.last(self._watched_key_upper_x)
         # Y ...
-        minv_y = min_slot.data().last(self._watched_key_lower_y)
-        maxv_y = max_slot.data().last(self._watched_key_upper_y)
+        minv_y = min_data.last(self._watched_key_lower_y)
+        maxv_y = max_data.last(self._watched_key_upper_y)
         # X ...
-        if lower_value_x is None or np.isnan(lower_value_x) or lower_value_x < minv_x or lower_value_x>=maxv_x:
+        # a value differing from itself is a NaN
+        if lower_value_x is None or lower_value_x != lower_value_x or lower_value_x < minv_x or lower_value_x>=maxv_x:
             lower_value_x = minv_x
             limit_changed = True
-        if (upper_value_x is None or np.isnan(upper_value_x) or upper_value_x > maxv_x or upper_value_x<=minv_x
+        if (upper_value_x is None or upper_value_x != upper_value_x or upper_value_x > maxv_x or upper_value_x<=minv_x
                 or upper_value_x<=lower_value_x):
             upper_value_x = maxv_x
             limit_changed = True
         # Y ...
-        if lower_value_y is None or np.isnan(lower_value_y) or lower_value_y < minv_y or lower_value_y>=maxv_y:
+        if lower_value_y is None or lower_value_y != lower_value_y or lower_value_y < minv_y or lower_value_y>=maxv_y:
             lower_value_y = minv_y
             limit_changed = True
-        if (upper_value_y is None or np.isnan(upper_value_y) or upper_value_y > maxv_y or upper_value_y<=minv_y
+        if (upper_value_y is None or upper_value_y != upper_value_y or upper_value_y > maxv_y or upper_value_y<=minv_y
                 or upper_value_y<=lower_value_y):
             upper_value_y = maxv_y
             limit_changed = True
@@ -351,7 +324,6 @@ class RangeQuery2d(TableModule):
                                           created=created,
                                           updated=updated,
                                           deleted=deleted)
-            self._table.selection = self._impl.result._values
         else:
             status = self._impl.resume(lower_value_x, upper_value_x,
                                            lower_value_y, upper_value_y,
@@ -359,5 +331,4 @@ class RangeQuery2d(TableModule):
                                            created=created,
                                            updated=updated,
                                            deleted=deleted)
-            self._table.selection = self._impl.result._values
         return self._return_run_step(self.next_state(input_slot), steps_run=steps)
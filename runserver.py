@@ -4,6 +4,7 @@ Starts the progressivis server and launches a python progressivis application.
 import sys
 import signal
 import logging
+from functools import lru_cache
 from os import getenv
 
 from six.moves import input
@@ -17,6 +18,13 @@ from progressivis.core.utils import Thread
 
 ENV = {}
 
+
+@lru_cache(maxsize=None)
+def _compile_script(filename):
+    "Compile a script once, even if it is given several times"
+    with open(filename) as script:
+        return compile(script.read(), filename, 'exec')
+
 for filename in sys.argv[1:]:
     if filename == "nosetests":
         continue
@@ -27,7 +35,7 @@ for filename in sys.argv[1:]:
     print("Loading '%s'" % filename)
     # pylint: disable=exec-used
     ENV['scheduler'] = Scheduler.default
-    exec(compile(open(filename).read(), filename, 'exec'), ENV, ENV)
+    exec(_compile_script(filename), ENV, ENV)
 
 def _signal_handler(signum, frame):
     # pylint: disable=unused-argument
@@ -62,6 +62,17 @@ EXTENSIONS = [
         include_dirs=[np.get_include(),],
         extra_compile_args=['-Wfatal-errors'],
     ),
+    # Pure Python module compiled for speed, the .py remains the fallback
+    Extension(
+        "progressivis.core.toposort",
+        ["progressivis/core/toposort.py"],
+        extra_compile_args=['-Wfatal-errors'],
+    ),
+    Extension(
+        "progressivis.core.run_loop",
+        ["progressivis/core/run_loop.py"],
+        extra_compile_args=['-Wfatal-errors'],
+    ),
     Extension("progressivis.core.khash.hashtable",
               ["progressivis/core/khash/hashtable.pyx",],
               include_dirs=['progressivis/core/khash/klib',
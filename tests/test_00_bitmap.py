@@ -1,4 +1,5 @@
 from progressivis.core.bitmap import bitmap
+import numpy as np
 from . import ProgressiveTest
 
 
@@ -50,10 +51,22 @@ class TestBitmap(ProgressiveTest):
         self.assertEqual(len(bm), 1000)
         bm.update(slice(1000, 1001))
         self.assertEqual(len(bm), 1001)
+        bm.update(slice(2000, 2010))
+        self.assertEqual(bm, bitmap(range(1001)) | bitmap(range(2000, 2010)))
         with self.assertRaises(TypeError):
             bm = bm & 10
         with self.assertRaises(TypeError):
             bm = bm + "hello"
 
+    def test_bitmap_ndarray(self):
+        arr = np.array([5, 1, 3, 1], dtype=np.int64)
+        self.assertEqual(bitmap(arr), bitmap([1, 3, 5]))
+        bm = bitmap([2])
+        bm.update(arr.astype(np.int32))
+        self.assertEqual(bm, bitmap([1, 2, 3, 5]))
+        self.assertEqual(bitmap(np.array([], dtype=np.int64)), bitmap())
+        with self.assertRaises(OverflowError):
+            bitmap(np.array([-1, 2]))
+
 if __name__ == '__main__':
     ProgressiveTest.main()
@@ -4,15 +4,28 @@ from . import ProgressiveTest, skip, skipIf
 import logging
 import sys
 import six
+import numpy as np
 from progressivis.datasets import (get_dataset, get_dataset_bz2,
                                        get_dataset_gz, get_dataset_lzma,
-                                       DATA_DIR)
+                                       get_dataset_npy, DATA_DIR)
+from progressivis.datasets import _iter_chunks
+import threading
 
 class TestLoadDatasets(ProgressiveTest):
     def test_load_smallfile(self):
         _ = get_dataset('smallfile')
     def test_load_bigfile(self):        
         _ = get_dataset('bigfile')
+    def test_load_smallfile_npy(self):
+        arr = np.load(get_dataset_npy('smallfile'), mmap_mode='r')
+        self.assertEqual(arr.shape, (30000, 10))
+        self.assertEqual(arr.dtype, np.float32)
+    def test_iter_chunks_closed(self):
+        chunks = _iter_chunks(get_dataset('bigfile'))
+        threads = threading.active_count()
+        next(chunks)  # starts the reader, which fills the queue
+        chunks.close()  # the caller gives up, the reader should stop
+        self.assertEqual(threading.active_count(), threads)
     def test_load_smallfile_bz2(self):
         _ = get_dataset_bz2('smallfile')
     def test_load_bigfile_bz2(self):        
@@ -1,5 +1,7 @@
 from progressivis import Module, Every, ProgressiveError, Table
 
+from progressivis.core.scheduler_base import FREED_BITS_THRESHOLD
+
 from . import ProgressiveTest
 
 
@@ -7,6 +9,10 @@ class SimpleModule(Module):
     def run_step(self, run_number, step_size, howlong):  # pragma no cover
         return self._return_run_step(self.state_blocked, 0)
 
+class VisModule(Every):
+    def is_visualization(self):
+        return True
+
 class TestProgressiveModule(ProgressiveTest):
     def test_scheduler(self):
         self.assertEqual(len(self.scheduler()), 0)
@@ -39,8 +45,139 @@ class TestProgressiveModule(ProgressiveTest):
         self.assertEqual(json.get('is_terminated'), False)
         json = module.to_json(short=False)
         self.assertEqual(json.get('start_time', 0), None)
+        self.assertEqual(Module.to_json_bulk([module, mod2], short=True),
+                         [module.to_json(short=True),
+                          mod2.to_json(short=True)])
+        json = module.to_json(fields=['id', 'progress'])
+        self.assertEqual(json, {'id': 'a', 'progress': [0, 0]})
+        with self.assertRaises(ProgressiveError):
+            module.to_json(fields=['nothing'])
         # maybe check others
         self.assertFalse(module.has_any_output())
 
+    def test_quantum_param(self):
+        s = self.scheduler()
+        module = SimpleModule(name='a', scheduler=s)
+        quanta = []
+        fix_quantum = s.fix_quantum
+        def _fix_quantum(mod, quantum, now=None):
+            quanta.append(quantum)
+            return fix_quantum(mod, quantum, now)
+        s.fix_quantum = _fix_quantum
+        module.run(1)
+        module.params.quantum = 0.2
+        module.run(2)
+        # written through the params Row, not cached
+        self.assertEqual(quanta, [0.5, 0.2])
+        module.params.debug = True
+        self.assertTrue(module.debug)
+
+    def test_connect_twice(self):
+        s = self.scheduler()
+        src1 = SimpleModule(name='src1', scheduler=s)
+        src2 = SimpleModule(name='src2', scheduler=s)
+        module = Every(proc=self.terse, name='every', scheduler=s)
+        module.input.df = src1.output._trace
+        with self.assertRaises(ProgressiveError):
+            module.input.df = src2.output._trace
+        self.assertIs(module.get_input_module('df'), src1)
+        self.assertTrue(module.has_any_input())
+        self.assertEqual(module._connected_inputs, 1)
+        self.assertEqual(module.required_input_slots(),
+                         [module.get_input_slot('df')])
+        self.assertIsNone(src2.get_output_slot('_trace'))
+
+    def test_add_connections(self):
+        s = self.scheduler()
+        src = SimpleModule(name='src', scheduler=s)
+        every1 = Every(proc=self.terse, name='every1', scheduler=s)
+        every2 = Every(proc=self.terse, name='every2', scheduler=s)
+        slots = s.add_connections([(src, '_trace', every1, 'df'),
+                                   (src, '_trace', every2, 'df')])
+        self.assertEqual(len(slots), 2)
+        self.assertIs(every1.get_input_module('df'), src)
+        self.assertIs(every2.get_input_module('df'), src)
+        self.assertEqual(src.get_output_slot('_trace'), slots)
+        order = s.order_modules()
+        self.assertEqual(order[0], 'src')
+        s.slots_updated()  # same dataflow, the order is reused
+        self.assertIs(s.order_modules(), order)
+
+    def test_incremental_order(self):
+        s = self.scheduler()
+        every2 = Every(proc=self.terse, name='every2', scheduler=s)
+        every1 = Every(proc=self.terse, name='every1', scheduler=s)
+        src = SimpleModule(name='src', scheduler=s)
+        every1.input.df = src.output._trace
+        every2.input.df = every1.output._trace
+        self.assertEqual(s.order_modules(), ['src', 'every1', 'every2'])
+
+    def test_remove_modules_bits(self):
+        s = self.scheduler()
+        src = SimpleModule(name='src', scheduler=s)
+        for _ in range(3*FREED_BITS_THRESHOLD):
+            every = Every(proc=self.terse, scheduler=s)
+            every.input.df = src.output._trace
+            self.assertEqual(s.order_modules(), ['src', every.name])
+            s.remove_module(every)
+        # the bits of the removed modules are reused, masks stay narrow
+        self.assertLessEqual(len(s._bits), 2)
+        self.assertLessEqual(s._next_bit, FREED_BITS_THRESHOLD + 2)
+        self.assertEqual(s.order_modules(), ['src'])
+
+    def test_remove_readd_module(self):
+        s = self.scheduler()
+        src = SimpleModule(name='src', scheduler=s)
+        def connect():
+            every = Every(proc=self.terse, name='every', scheduler=s)
+            every.input.df = src.output._trace
+            vis = VisModule(proc=self.terse, name='vis', scheduler=s)
+            vis.input.df = every.output._trace
+            self.assertEqual(s.order_modules(), ['src', 'every', 'vis'])
+            return every, vis
+        every, vis = connect()
+        s.remove_module(vis)
+        s.remove_module(every)
+        every, vis = connect()  # same dataflow as before the removal
+        s.for_input(src)
+        self.assertTrue(s.has_input())
+        self.assertTrue(s._consider_module(every, True))
+        self.assertTrue(s._consider_module(vis, True))
+        self.assertEqual(s.reachable_from_inputs(['src']),
+                         {'src', 'every', 'vis'})
+
+    def test_cycles(self):
+        s = self.scheduler()
+        every1 = Every(proc=self.terse, name='every1', scheduler=s)
+        every2 = Every(proc=self.terse, name='every2', scheduler=s)
+        every2.input.df = every1.output._trace
+        with self.assertRaises(ProgressiveError):
+            every1.input.df = every2.output._trace
+        self.assertIsNone(every1.get_input_slot('df'))
+        # the rejected slot is disconnected and no longer counted
+        self.assertFalse(every1.has_any_input())
+        self.assertEqual(every1._connected_inputs, 0)
+        # cycles through optional slots are broken when ordering
+        every1.input._params = every2.output._trace
+        self.assertEqual(s.order_modules(), ['every1', 'every2'])
+        # modules depending on the cycle are sorted after it
+        every3 = Every(proc=self.terse, name='every3', scheduler=s)
+        every3.input.df = every2.output._trace
+        self.assertEqual(s.order_modules(), ['every1', 'every2', 'every3'])
+
+    def test_cycles_duplicate_input(self):
+        s = self.scheduler()
+        src = SimpleModule(name='src', scheduler=s)
+        every1 = Every(proc=self.terse, name='every1', scheduler=s)
+        every2 = Every(proc=self.terse, name='every2', scheduler=s)
+        every2.input.df = every1.output._trace
+        every1.input._params = src.output._trace
+        # a rejected connection does not mark the dataflow as cyclic
+        with self.assertRaises(ProgressiveError):
+            every1.input._params = every2.output._trace
+        self.assertFalse(s._cyclic)
+        self.assertIs(every1.get_input_module('_params'), src)
+        self.assertEqual(s.order_modules(), ['src', 'every1', 'every2'])
+
 if __name__ == '__main__':
     ProgressiveTest.main()
@@ -5,6 +5,9 @@ from progressivis.stats import  RandomTable
 from progressivis.table.bisectmod import Bisect
 from progressivis.core.bitmap import bitmap
 from progressivis.table.hist_index import HistogramIndex
+from progressivis.table.cmp_kernels import select_ids
+import numpy as np
+import operator
 
 from . import ProgressiveTest
 
@@ -28,7 +31,26 @@ class TestBisect(ProgressiveTest):
         s.join()
         idx = random.table().eval('_1>0.5', result_object='index')
         self.assertEqual(bisect_._table.selection, bitmap(idx))
+        # direct evaluation on the column gives the same result
+        # pylint: disable=protected-access
+        self.assertEqual(bisect_._impl._eval_to_ids(0.5, random.table().index),
+                         bitmap(idx))
 
+    def test_select_ids(self):
+        values = np.array([0.1, 0.5, 0.9, 0.5, 0.3])
+        indices = np.array([4, 0, 1, 2])
+        ids = np.array([40, 0, 10, 20])
+        for op in (operator.gt, operator.ge, operator.lt,
+                   operator.le, operator.eq, operator.ne):
+            expected = [i for (j, i) in zip(indices, ids)
+                        if op(values[j], 0.5)]
+            self.assertEqual(list(select_ids(op, values, indices, ids, 0.5)),
+                             expected)
+        values = np.random.rand(100001)
+        ids = np.arange(len(values))
+        self.assertTrue(np.array_equal(
+            select_ids(operator.lt, values, ids, ids, 0.5),
+            np.flatnonzero(values < 0.5)))
 
 if __name__ == '__main__':
     ProgressiveTest.main()
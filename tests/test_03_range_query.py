@@ -5,7 +5,8 @@ from progressivis.table.table import Table
 from progressivis import Print
 from progressivis.stats import  RandomTable, Min, Max
 from progressivis.core.bitmap import bitmap
-from progressivis.table.range_query import RangeQuery
+from progressivis.table.range_query import RangeQuery, RangeQueryImpl
+from progressivis.table.hist_index import _HistogramIndexImpl
 import numpy as np
 from . import ProgressiveTest, main, skip
 
@@ -110,6 +111,11 @@ class TestRangeQuery(ProgressiveTest):
         min_rand = random.table().min()['_1']
         self.assertAlmostEqual(min_data['_1'].loc[0], min_rand, delta=0.0001)
         self.assertAlmostEqual(max_data['_1'].loc[0], 1.0, delta=0.0001)        
+        # the bounds followed the min/max of the data while it was loaded
+        values = random.table()['_1'].values
+        idx = np.flatnonzero((values >= min_data['_1'].loc[0]) &
+                             (values < max_data['_1'].loc[0]))
+        self.assertEqual(range_qry.table().selection, bitmap(idx))
 
     def test_range_query_min_max3(self):
         "Test min and max on RangeQuery output"
@@ -126,6 +132,22 @@ class TestRangeQuery(ProgressiveTest):
         self.assertAlmostEqual(min_data['_1'].loc[0], 0.3)
         self.assertAlmostEqual(max_data['_1'].loc[0], max_rand)
         
+    def test_range_query_shift(self):
+        "Test the selection when the bounds move slightly"
+        values = np.random.rand(1000) * 100
+        t = Table(name=None, dshape='{_1: float64}', data={'_1': values})
+        hist_index = _HistogramIndexImpl('_1', t, 0.0, 100.0, 4)
+        def brute(lower, upper):
+            return bitmap(np.flatnonzero((values >= lower) & (values < upper)))
+        # both bounds in the same bin
+        self.assertEqual(hist_index.range_query(30, 35), brute(30, 35))
+        impl = RangeQueryImpl('_1', hist_index, approximate=False)
+        impl.resume(20, 60, limit_changed=True)
+        self.assertEqual(impl.result._values, brute(20, 60))
+        for lower, upper in [(21, 61), (20.5, 59), (22, 60.5), (21, 62)]:
+            self.assertTrue(impl._can_shift(lower, upper))
+            impl.resume(lower, upper, limit_changed=True)
+            self.assertEqual(impl.result._values, brute(lower, upper))
 
 if __name__ == '__main__':
     main()